@@ -0,0 +1,406 @@
+"""
+Build a corpus-wide word-frequency index for difficulty ranking.
+
+This script streams over every precomputed subtitle file, normalizes each
+word (entity decoding, punctuation stripping, case folding, Hangul NFC
+composition) and counts how often it occurs across the whole corpus. Small
+corpora are counted exactly; large ones use a count-min sketch with
+heavy-hitter tracking so memory stays bounded. Partial counts from parallel
+workers are merged before ranking.
+
+The resulting rank table is saved to data/frequency_index.json and every
+word in each video's output gets a frequency_rank (1 = most common). Real
+words outside the table (rarer than the sketch's heavy hitters) rank just
+below the rarest ranked token; None is kept for non-words such as [Music].
+
+Usage:
+    python build_frequency_index.py [--sketch | --exact] [--workers N] [FILES...]
+
+Not for production use.
+"""
+
+import os
+import sys
+import json
+import glob
+import heapq
+import html
+import hashlib
+import unicodedata
+from array import array
+from collections import Counter
+from functools import reduce
+from multiprocessing import Pool
+
+
+# Above this many bytes of precomputed JSON, "auto" switches to the sketch
+SKETCH_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+# Count-min sketch dimensions: error ~ 2/width of total count, with
+# probability 1 - 0.5^depth
+SKETCH_WIDTH = 2 ** 16
+SKETCH_DEPTH = 4
+
+# Number of heavy hitters the sketch keeps (and therefore ranks)
+HEAVY_HITTERS = 5000
+
+
+def is_hangul(char):
+    """Check whether a character is a Hangul syllable or jamo."""
+    code = ord(char)
+    return (
+        0xAC00 <= code <= 0xD7A3      # Syllables
+        or 0x1100 <= code <= 0x11FF   # Jamo
+        or 0x3130 <= code <= 0x318F   # Compatibility jamo
+    )
+
+
+def normalize_token(word):
+    """
+    Normalize a raw subtitle word for frequency counting.
+    
+    Decodes HTML entities, composes Hangul into NFC syllables (so decomposed
+    jamo from some caption sources match), case folds Latin text and strips
+    punctuation and symbols. Bracketed annotations such as [음악] or
+    (applause) are not speech and return None.
+    
+    Args:
+        word: raw word string from precompute_subtitles
+    
+    Returns:
+        str: normalized token, or None if nothing countable is left
+    """
+    text = unicodedata.normalize("NFC", html.unescape(word)).strip()
+    if not text:
+        return None
+    
+    # Sound/annotation tags, e.g. [음악], [Music], (laughs)
+    if (text[0], text[-1]) in (("[", "]"), ("(", ")")):
+        return None
+    
+    kept = []
+    for char in text.casefold():
+        category = unicodedata.category(char)
+        if category[0] in "PSZC":
+            continue
+        kept.append(char)
+    
+    token = "".join(kept)
+    
+    # Require at least one letter (Hangul or otherwise); drops bare numbers
+    if not any(is_hangul(c) or c.isalpha() for c in token):
+        return None
+    
+    return token
+
+
+class ExactCounter:
+    """Exact token counts backed by collections.Counter."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+
+    def add(self, token, count=1):
+        self.counts[token] += count
+        self.total += count
+
+    def merge(self, other):
+        """Merge another ExactCounter into this one."""
+        self.counts.update(other.counts)
+        self.total += other.total
+        return self
+
+    def most_common(self, n=None):
+        return self.counts.most_common(n)
+
+
+class CountMinSketch:
+    """
+    Count-min sketch with heavy-hitter tracking.
+    
+    Memory is fixed at width * depth counters plus `capacity` candidate
+    tokens. Estimates never undercount; overcounts are bounded by the
+    sketch width. Only the tracked heavy hitters can be ranked.
+    """
+
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH, capacity=HEAVY_HITTERS):
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.tables = [array("Q", bytes(8 * width)) for _ in range(depth)]
+        self.total = 0
+        
+        # token -> current estimate, plus a lazy min-heap over the same data
+        self.top = {}
+        self.heap = []
+
+    def _indexes(self, token):
+        # Stable across processes (unlike hash()), so worker sketches line up
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def estimate(self, token):
+        return min(table[i] for table, i in zip(self.tables, self._indexes(token)))
+
+    def _track(self, token, estimate):
+        """Offer a token to the heavy-hitter set."""
+        if token in self.top or len(self.top) < self.capacity:
+            self.top[token] = estimate
+            heapq.heappush(self.heap, (estimate, token))
+        else:
+            # Drop stale heap entries until the minimum is current
+            while self.top.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            if estimate <= self.heap[0][0]:
+                return
+            _, evicted = heapq.heapreplace(self.heap, (estimate, token))
+            del self.top[evicted]
+            self.top[token] = estimate
+        
+        # Keep the lazy heap from growing without bound
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(est, tok) for tok, est in self.top.items()]
+            heapq.heapify(self.heap)
+
+    def add(self, token, count=1):
+        estimate = None
+        for table, i in zip(self.tables, self._indexes(token)):
+            table[i] += count
+            if estimate is None or table[i] < estimate:
+                estimate = table[i]
+        self.total += count
+        self._track(token, estimate)
+
+    def merge(self, other):
+        """Merge another sketch with the same dimensions into this one."""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge sketches with different dimensions")
+        
+        for mine, theirs in zip(self.tables, other.tables):
+            for i, value in enumerate(theirs):
+                if value:
+                    mine[i] += value
+        self.total += other.total
+        
+        # Re-estimate every candidate from the merged tables
+        candidates = set(self.top) | set(other.top)
+        self.top = {}
+        self.heap = []
+        for token in candidates:
+            self._track(token, self.estimate(token))
+        return self
+
+    def most_common(self, n=None):
+        ranked = sorted(self.top.items(), key=lambda item: (-item[1], item[0]))
+        return ranked if n is None else ranked[:n]
+
+
+def make_counter(method):
+    """Create an empty counter for 'exact' or 'sketch'."""
+    if method == "sketch":
+        return CountMinSketch()
+    return ExactCounter()
+
+
+def choose_method(paths):
+    """Pick 'exact' for small corpora and 'sketch' for large ones."""
+    total_bytes = sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+    return "sketch" if total_bytes > SKETCH_THRESHOLD_BYTES else "exact"
+
+
+def load_precomputed(path):
+    """
+    Load one precomputed subtitle file.
+    
+    Returns:
+        dict or list: precomputed data, or None if missing or invalid
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Skipping {path}: {e}")
+        return None
+
+
+def get_words(data):
+    """Return the words list from {"words": [...]} or a bare list of words."""
+    if isinstance(data, list):
+        return data
+    return data.get("words", [])
+
+
+def count_files(paths, method):
+    """
+    Count normalized tokens over a batch of precomputed files.
+    
+    Files are loaded one at a time, so only a single video is in memory.
+    
+    Args:
+        paths: list of subs_precomputed.json paths
+        method: 'exact' or 'sketch'
+    
+    Returns:
+        ExactCounter or CountMinSketch with partial counts for the batch
+    """
+    counter = make_counter(method)
+    for path in paths:
+        data = load_precomputed(path)
+        if not data:
+            continue
+        for word in get_words(data):
+            token = normalize_token(word["word"])
+            if token:
+                counter.add(token)
+    return counter
+
+
+def _count_batch(args):
+    return count_files(*args)
+
+
+def count_corpus(paths, method="auto", workers=1):
+    """
+    Count tokens across the whole corpus, optionally in parallel.
+    
+    Args:
+        paths: list of subs_precomputed.json paths
+        method: 'exact', 'sketch' or 'auto'
+        workers: number of worker processes
+    
+    Returns:
+        ExactCounter or CountMinSketch with merged counts
+    """
+    if method == "auto":
+        method = choose_method(paths)
+    
+    if workers <= 1 or len(paths) <= 1:
+        return count_files(paths, method)
+    
+    # Round-robin the files so each worker gets a similar mix of sizes
+    batches = [(paths[i::workers], method) for i in range(workers)]
+    with Pool(workers) as pool:
+        partials = pool.map(_count_batch, batches)
+    
+    return reduce(lambda a, b: a.merge(b), partials)
+
+
+def build_rank_table(counter):
+    """
+    Build a token -> rank table (1 = most common).
+    
+    Ties in count get the same rank, so equally common words are treated
+    as equally difficult.
+    
+    Returns:
+        dict: token to rank
+    """
+    ranks = {}
+    rank = 0
+    previous_count = None
+    for position, (token, count) in enumerate(counter.most_common(), start=1):
+        if count != previous_count:
+            rank = position
+            previous_count = count
+        ranks[token] = rank
+    return ranks
+
+
+def attach_frequency_ranks(precomputed_data, ranks):
+    """
+    Add a frequency_rank field to every word of one video's output.
+    
+    Args:
+        precomputed_data: dict with words array from precompute_subtitles
+                          (or a bare list of words)
+        ranks: dict returned by build_rank_table
+    
+    Returns:
+        dict: the same precomputed_data, updated in place; words missing
+              from ranks get one past the lowest rank, non-words get None
+    """
+    # Sketch mode only ranks the heavy hitters; everything rarer is still a
+    # word and must stay distinguishable from annotations
+    unranked = max(ranks.values(), default=0) + 1
+    
+    for word in get_words(precomputed_data):
+        token = normalize_token(word["word"])
+        word["frequency_rank"] = ranks.get(token, unranked) if token else None
+    return precomputed_data
+
+
+def save_json(data, output_path, indent=2):
+    """Save data as UTF-8 JSON, creating the parent directory if needed."""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+
+
+def main():
+    """Main function to build the frequency index and annotate each video."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    index_path = os.path.join(script_dir, "data", "frequency_index.json")
+    
+    args = sys.argv[1:]
+    method = "auto"
+    workers = 1
+    paths = []
+    
+    i = 0
+    while i < len(args):
+        if args[i] == "--sketch":
+            method = "sketch"
+        elif args[i] == "--exact":
+            method = "exact"
+        elif args[i] == "--workers" and i + 1 < len(args):
+            workers = int(args[i + 1])
+            i += 1
+        else:
+            paths.append(args[i])
+        i += 1
+    
+    if not paths:
+        pattern = os.path.join(script_dir, "data", "**", "subs_precomputed*.json")
+        paths = sorted(glob.glob(pattern, recursive=True))
+    
+    if not paths:
+        print("Error: No precomputed subtitle files found. Run precompute_youtube_subs.py first.")
+        return
+    
+    if method == "auto":
+        method = choose_method(paths)
+    
+    print(f"Counting {len(paths)} file(s) with {method} counter, {workers} worker(s)...")
+    counter = count_corpus(paths, method, workers)
+    ranks = build_rank_table(counter)
+    
+    save_json({
+        "method": method,
+        "total_tokens": counter.total,
+        "ranks": ranks
+    }, index_path)
+    print(f"Saved {len(ranks)} ranked tokens to {index_path}")
+    
+    # Attach ranks to each video's output
+    for path in paths:
+        data = load_precomputed(path)
+        if data is None:
+            continue
+        save_json(attach_frequency_ranks(data, ranks), path)
+        print(f"Annotated {path}")
+    
+    print("\n" + "="*50)
+    print("Frequency Index Summary")
+    print("="*50)
+    print(f"Total tokens counted: {counter.total}")
+    print(f"Ranked vocabulary: {len(ranks)}")
+    for token, count in counter.most_common(5):
+        print(f"  {ranks[token]:>4}. {token} ({count})")
+    print("="*50 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+"""
+Build a word search index over processed subtitles.
+
+This script indexes every precomputed subtitle file so learners can find
+words they misspell or half-remember without scanning each
+subs_precomputed.json:
+
+- a sorted vocabulary of normalized tokens for prefix queries
+- a trigram posting list over the vocabulary for substring and fuzzy matches
+- positional postings from each token back to (video, word_id, start)
+
+All posting lists are delta-encoded as varints and packed into a single
+binary file (data/search_index.bin) behind a small JSON header. Lists are
+decoded lazily at query time, so loading the index only reads bytes.
+
+Usage:
+    python build_search_index.py [FILES...]          # build
+    python build_search_index.py --query WORD        # fuzzy search
+    python build_search_index.py --prefix TEXT       # words starting with TEXT
+    python build_search_index.py --substring TEXT    # words containing TEXT
+    python build_search_index.py --benchmark         # synthetic 1M-word corpus
+
+Not for production use.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import random
+import struct
+from bisect import bisect_left
+
+from build_frequency_index import normalize_token, load_precomputed, get_words
+from timebase import ms_to_seconds, seconds_to_ms
+
+
+INDEX_MAGIC = b"SUBIDX1\n"
+
+# Marks word boundaries in trigrams so prefixes/suffixes weigh in fuzzy matches
+BOUNDARY = "\x02"
+
+
+def encode_varint(value, out):
+    """Append an unsigned LEB128 varint to a bytearray."""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(blob, offset, count):
+    """
+    Decode `count` unsigned varints starting at `offset`.
+    
+    Returns:
+        list: decoded integers
+    """
+    values = []
+    pos = offset
+    for _ in range(count):
+        value = 0
+        shift = 0
+        while True:
+            byte = blob[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(value)
+    return values
+
+
+def zigzag(value):
+    """Map a signed integer to unsigned so small negatives stay small."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def trigrams(term, padded=True):
+    """
+    Split a term into its set of character trigrams.
+    
+    Args:
+        term: normalized token
+        padded: add boundary markers (used for fuzzy matching and indexing)
+    
+    Returns:
+        set: trigram strings
+    """
+    if padded:
+        term = BOUNDARY * 2 + term + BOUNDARY * 2
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Levenshtein distance with an early exit.
+    
+    Returns:
+        int: distance, or max_distance + 1 if it is larger than max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def fuzzy_distance(query):
+    """
+    Default edit budget for a query: one edit per ~3 characters, at most 2.
+    
+    Korean words are short (one syllable is a whole morpheme), so a fixed
+    budget of 2 would match most of the vocabulary for 2-syllable queries.
+    """
+    return min(2, len(query) // 3)
+
+
+def video_id_for_path(path):
+    """
+    Derive a video identifier from a precomputed file path.
+    
+    data/<video>/subs_precomputed.json -> <video>; files directly in data/
+    fall back to the file name without extension. When a video directory
+    holds more than one precomputed file (e.g. subs_precomputed_en.json and
+    subs_precomputed_ko.json) the file name is kept as well:
+    <video>/subs_precomputed_en.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    parent = os.path.basename(directory)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if not parent or parent == "data":
+        return stem
+    
+    siblings = set(glob.glob(os.path.join(directory, "subs_precomputed*.json")))
+    siblings.add(os.path.abspath(path))
+    if len(siblings) > 1:
+        return f"{parent}/{stem}"
+    return parent
+
+
+class SearchIndex:
+    """
+    Trigram, prefix and positional index over normalized subtitle words.
+    
+    Build with SearchIndex.build(), persist with save()/load().
+    """
+
+    def __init__(self, videos, vocab, trigram_table, posting_table, blob):
+        self.videos = videos
+        self.vocab = vocab
+        self.trigram_table = trigram_table
+        self.posting_table = posting_table
+        self.blob = blob
+        self._trigram_cache = {}
+
+    @classmethod
+    def build(cls, corpus):
+        """
+        Build an index from precomputed words.
+        
+        Args:
+            corpus: iterable of (video_id, words) pairs, words as produced
+                    by precompute_subtitles
+        
+        Returns:
+            SearchIndex
+        """
+        videos = []
+        positions = {}
+        
+        for video_index, (video_id, words) in enumerate(corpus):
+            videos.append(video_id)
+            for word in words:
+                token = normalize_token(word["word"])
+                if not token:
+                    continue
+                positions.setdefault(token, []).append(
+                    (video_index, word["word_id"], seconds_to_ms(word["start"]))
+                )
+        
+        vocab = sorted(positions)
+        blob = bytearray()
+        
+        # Positional postings: (video delta, word_id delta, start delta) triples;
+        # word_id and start restart from absolute values on a new video
+        posting_table = []
+        for token in vocab:
+            entries = sorted(positions[token])
+            offset = len(blob)
+            prev_video, prev_word, prev_start = 0, 0, 0
+            for video_index, word_id, start_ms in entries:
+                if video_index != prev_video:
+                    prev_word, prev_start = 0, 0
+                encode_varint(video_index - prev_video, blob)
+                encode_varint(zigzag(word_id - prev_word), blob)
+                encode_varint(zigzag(start_ms - prev_start), blob)
+                prev_video, prev_word, prev_start = video_index, word_id, start_ms
+            posting_table.append([offset, len(entries)])
+        
+        # Trigram postings over term IDs, which are already ascending
+        trigram_terms = {}
+        for term_id, token in enumerate(vocab):
+            for gram in trigrams(token):
+                trigram_terms.setdefault(gram, []).append(term_id)
+        
+        trigram_table = {}
+        for gram in sorted(trigram_terms):
+            term_ids = trigram_terms[gram]
+            offset = len(blob)
+            previous = 0
+            for term_id in term_ids:
+                encode_varint(term_id - previous, blob)
+                previous = term_id
+            trigram_table[gram] = [offset, len(term_ids)]
+        
+        return cls(videos, vocab, trigram_table, posting_table, bytes(blob))
+
+    def save(self, path):
+        """
+        Write the index as magic + header length + JSON header + posting blob.
+        """
+        header = json.dumps({
+            "videos": self.videos,
+            "vocab": self.vocab,
+            "trigrams": self.trigram_table,
+            "postings": self.posting_table
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            f.write(self.blob)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index written by save().
+        
+        Raises:
+            ValueError: if the file is not a search index
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                raise ValueError(f"Not a search index: {path}")
+            (header_length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_length).decode("utf-8"))
+            blob = f.read()
+        
+        return cls(header["videos"], header["vocab"], header["trigrams"],
+                   header["postings"], blob)
+
+    def _trigram_terms(self, gram):
+        """Decode the term-ID posting list for one trigram (cached)."""
+        if gram not in self._trigram_cache:
+            entry = self.trigram_table.get(gram)
+            if entry is None:
+                term_ids = []
+            else:
+                offset, count = entry
+                term_ids = decode_varints(self.blob, offset, count)
+                for i in range(1, count):
+                    term_ids[i] += term_ids[i - 1]
+            self._trigram_cache[gram] = term_ids
+        return self._trigram_cache[gram]
+
+    def prefix(self, prefix, limit=50):
+        """
+        Find vocabulary terms starting with a prefix.
+        
+        Returns:
+            list: matching terms in sorted order
+        """
+        prefix = normalize_token(prefix)
+        if not prefix:
+            return []
+        
+        results = []
+        i = bisect_left(self.vocab, prefix)
+        while i < len(self.vocab) and self.vocab[i].startswith(prefix) and len(results) < limit:
+            results.append(self.vocab[i])
+            i += 1
+        return results
+
+    def substring(self, query, limit=50):
+        """
+        Find vocabulary terms containing a substring.
+        
+        Queries of three or more characters intersect trigram postings;
+        shorter ones fall back to a vocabulary scan.
+        
+        Returns:
+            list: matching terms in sorted order
+        """
+        query = normalize_token(query)
+        if not query:
+            return []
+        
+        if len(query) < 3:
+            candidates = range(len(self.vocab))
+        else:
+            # Intersect the shortest posting lists first
+            lists = sorted((self._trigram_terms(g) for g in trigrams(query, padded=False)), key=len)
+            candidates = set(lists[0])
+            for term_ids in lists[1:]:
+                candidates.intersection_update(term_ids)
+                if not candidates:
+                    break
+            candidates = sorted(candidates)
+        
+        results = []
+        for term_id in candidates:
+            if query in self.vocab[term_id]:
+                results.append(self.vocab[term_id])
+                if len(results) >= limit:
+                    break
+        return results
+
+    def fuzzy(self, query, max_distance=None, limit=20):
+        """
+        Find vocabulary terms within an edit distance of the query.
+        
+        Candidates must share enough padded trigrams with the query (each
+        edit destroys at most three), then are verified with Levenshtein.
+        
+        Args:
+            query: raw search text
+            max_distance: allowed edits; defaults to fuzzy_distance(query)
+            limit: maximum number of terms returned
+        
+        Returns:
+            list: (term, distance) pairs, closest first
+        """
+        query = normalize_token(query)
+        if not query:
+            return []
+        
+        if max_distance is None:
+            max_distance = fuzzy_distance(query)
+        
+        grams = trigrams(query)
+        min_shared = len(grams) - 3 * max_distance
+        
+        if min_shared <= 0:
+            # Too short for the trigram filter to prune anything
+            candidates = [
+                term_id for term_id, term in enumerate(self.vocab)
+                if abs(len(term) - len(query)) <= max_distance
+            ]
+        else:
+            shared = {}
+            for gram in grams:
+                for term_id in self._trigram_terms(gram):
+                    shared[term_id] = shared.get(term_id, 0) + 1
+            candidates = [t for t, n in shared.items() if n >= min_shared]
+        
+        matches = []
+        for term_id in candidates:
+            term = self.vocab[term_id]
+            distance = edit_distance(query, term, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, term))
+        
+        matches.sort()
+        return [(term, distance) for distance, term in matches[:limit]]
+
+    def occurrences(self, term, limit=None):
+        """
+        List every occurrence of a vocabulary term.
+        
+        Args:
+            term: normalized term (as returned by prefix/substring/fuzzy)
+            limit: stop decoding after this many occurrences
+        
+        Returns:
+            list: dicts with video, word_id and start (seconds)
+        """
+        i = bisect_left(self.vocab, term)
+        if i == len(self.vocab) or self.vocab[i] != term:
+            return []
+        
+        offset, count = self.posting_table[i]
+        if limit is not None:
+            count = min(count, limit)
+        
+        values = decode_varints(self.blob, offset, count * 3)
+        results = []
+        video, word_id, start_ms = 0, 0, 0
+        for j in range(0, len(values), 3):
+            if values[j]:
+                video += values[j]
+                word_id, start_ms = 0, 0
+            word_id += unzigzag(values[j + 1])
+            start_ms += unzigzag(values[j + 2])
+            results.append({
+                "video": self.videos[video],
+                "word_id": word_id,
+                "start": ms_to_seconds(start_ms)
+            })
+        return results
+
+    def search(self, query, mode="fuzzy", limit=100):
+        """
+        Find occurrences of every term matching a query.
+        
+        Args:
+            query: raw search text
+            mode: 'prefix', 'substring' or 'fuzzy'
+            limit: maximum number of occurrences returned
+        
+        Returns:
+            list: occurrence dicts with an added 'term' field
+        """
+        if mode == "prefix":
+            terms = self.prefix(query)
+        elif mode == "substring":
+            terms = self.substring(query)
+        elif mode == "fuzzy":
+            terms = [term for term, _ in self.fuzzy(query)]
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        results = []
+        for term in terms:
+            for hit in self.occurrences(term, limit - len(results)):
+                hit["term"] = term
+                results.append(hit)
+            if len(results) >= limit:
+                break
+        return results
+
+
+def load_corpus(paths):
+    """Yield (video_id, words) for each precomputed file, one at a time."""
+    for path in paths:
+        data = load_precomputed(path)
+        if data is not None:
+            yield video_id_for_path(path), get_words(data)
+
+
+def run_benchmark(num_words=1_000_000, num_videos=200, seed=0):
+    """Build an index over a synthetic corpus and time typical queries."""
+    rng = random.Random(seed)
+    syllables = "가나다라마바사아자차카타파하고노도로모보소오조초코토포호"
+    
+    # Zipf-like vocabulary so common words dominate, as in real subtitles
+    vocab = list({"".join(rng.choice(syllables) for _ in range(rng.randint(1, 4)))
+                  for _ in range(60000)})
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    
+    words_per_video = num_words // num_videos
+    corpus = []
+    for v in range(num_videos):
+        tokens = rng.choices(vocab, weights, k=words_per_video)
+        corpus.append((f"video{v}", [
+            {"word_id": i + 1, "word": token, "start": i * 0.4, "end": i * 0.4 + 0.4,
+             "sentence_id": i // 8}
+            for i, token in enumerate(tokens)
+        ]))
+    
+    started = time.perf_counter()
+    index = SearchIndex.build(corpus)
+    build_seconds = time.perf_counter() - started
+    
+    print(f"Indexed {num_words} words, {len(index.vocab)} terms, "
+          f"{len(index.blob) / 1e6:.1f} MB postings in {build_seconds:.1f}s")
+    
+    queries = rng.sample(index.vocab, 200)
+    for mode in ("prefix", "substring", "fuzzy"):
+        started = time.perf_counter()
+        for query in queries:
+            index.search(query[:2] if mode == "prefix" else query, mode=mode, limit=100)
+        per_query = (time.perf_counter() - started) / len(queries) * 1000
+        print(f"  {mode:<10} {per_query:.2f} ms/query")
+
+
+def main():
+    """Main function to build or query the subtitle search index."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    index_path = os.path.join(script_dir, "data", "search_index.bin")
+    args = sys.argv[1:]
+    
+    if args and args[0] == "--benchmark":
+        run_benchmark()
+        return
+    
+    query_modes = {"--query": "fuzzy", "--prefix": "prefix", "--substring": "substring"}
+    if args and args[0] in query_modes:
+        if len(args) < 2:
+            print(f"Error: {args[0]} needs a word")
+            return
+        if not os.path.exists(index_path):
+            print(f"Error: No index at {index_path}. Build it first.")
+            return
+        index = SearchIndex.load(index_path)
+        for hit in index.search(args[1], mode=query_modes[args[0]]):
+            print(f"{hit['term']:<15} {hit['video']:<20} word {hit['word_id']:<6} @ {hit['start']:.2f}s")
+        return
+    
+    paths = args or sorted(glob.glob(
+        os.path.join(script_dir, "data", "**", "subs_precomputed*.json"), recursive=True))
+    if not paths:
+        print("Error: No precomputed subtitle files found. Run precompute_youtube_subs.py first.")
+        return
+    
+    index = SearchIndex.build(load_corpus(paths))
+    index.save(index_path)
+    
+    print(f"Indexed {len(paths)} file(s): {len(index.vocab)} terms, "
+          f"{len(index.trigram_table)} trigrams, {len(index.blob)} bytes of postings")
+    print(f"Saved search index to {index_path}")
+
+
+if __name__ == "__main__":
+    main()
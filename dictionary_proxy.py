@@ -0,0 +1,632 @@
+"""
+Local dictionary lookup proxy for the dioco hover-dictionary endpoint.
+
+index.html and subtitle-buffer.js send one request per hovered word straight
+to dioco, with only per-tab in-memory caching. This service sits in front of
+the upstream endpoint and:
+
+- serves lookups from a persistent on-disk cache (SQLite) with TTL expiry
+  and LRU eviction, so popular words are fetched once across sessions
+- coalesces concurrent identical lookups into a single upstream request
+- prewarms a whole video's vocabulary (from precompute_subtitles output)
+  as one background job, issuing exactly the lookups each player makes
+  (see HOVER_CLIENTS)
+
+It mirrors the upstream path, so clients only need to swap the base URL
+(dictionaryEndpoint option in subtitle-buffer.js/subtitle-dictionary.js,
+?dictionaryEndpoint=http://127.0.0.1:8765 for index.html):
+
+    GET  /base_dict_getHoverDict_8?form=...&sl=ko&tl=en   cached lookup
+    POST /prewarm   {"words": [...]} (precomputed output)  start prewarm job
+    GET  /prewarm/<job_id>                                  job progress
+
+The upstream URL is configurable, so the service can be exercised against
+a local stub instead of dioco.
+
+Usage:
+    python dictionary_proxy.py [--port 8765] [--upstream URL] [--prewarm FILE]
+    python dictionary_proxy.py --self-check
+
+Not for production use.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_UPSTREAM = "https://api-cdn-plus.dioco.io/base_dict_getHoverDict_8"
+LOOKUP_PATH = "/base_dict_getHoverDict_8"
+
+# Query parameters forwarded upstream and used in the cache key
+LOOKUP_PARAMS = ("form", "lemma", "sl", "tl", "pos", "pow")
+
+# Hover lookups as each player issues them: the extra parameters it sends
+# besides form/sl/tl, and whether it looks up the subtitle word as stored
+# ("너를,") or the tokens of SubtitleBuffer.tokenize ("너를")
+HOVER_CLIENTS = (
+    # index.html fetchDictionary, subtitle-dictionary.js fetchDefinition
+    {"extra": {"lemma": "", "pos": "NOUN", "pow": "n"}, "tokenize": False},
+    # subtitle-buffer.js fetchDefinition
+    {"extra": {}, "tokenize": True},
+)
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 100000
+UPSTREAM_TIMEOUT = 10
+PREWARM_WORKERS = 4
+
+# How long a coalesced lookup waits for the leader's upstream request
+FOLLOWER_TIMEOUT = 2 * UPSTREAM_TIMEOUT
+
+# Same split as SubtitleBuffer.tokenize in subtitle-buffer.js
+_TOKEN_SPLIT = re.compile(r'[\s\-,.!?;:"\'()]')
+_DIGITS_ONLY = re.compile(r'[0-9]+')
+
+
+class UpstreamError(Exception):
+    """Raised when the upstream dictionary request fails."""
+
+
+class DictionaryCache:
+    """
+    Persistent lookup cache with TTL expiry and LRU eviction.
+    
+    Entries live in a single SQLite table keyed by the canonical query
+    string. Reads bump last_access; writes evict least recently used
+    entries once max_entries is exceeded.
+    """
+
+    def __init__(self, path, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+        self.db.commit()
+
+    def get(self, key):
+        """
+        Return the cached value for a key, or None if missing or expired.
+        """
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value, fetched_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            value, fetched_at = row
+            if now - fetched_at > self.ttl_seconds:
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            
+            self.db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self.db.commit()
+        return json.loads(value)
+
+    def put(self, key, value):
+        """Store a value and evict least recently used entries if over capacity."""
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, fetched_at, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            (count,) = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if count > self.max_entries:
+                self.db.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    " SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.db.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+def canonical_params(params):
+    """
+    Keep only known lookup parameters and sort them.
+    
+    Empty values (index.html's lemma='') are kept, so the upstream request
+    is exactly what the client sent.
+    
+    Returns:
+        tuple: (key, value) pairs; also used as the cache key
+    """
+    return tuple(sorted(
+        (name, str(params[name])) for name in LOOKUP_PARAMS
+        if params.get(name) is not None
+    ))
+
+
+def tokenize(text):
+    """Split text like SubtitleBuffer.tokenize, dropping digit-only tokens."""
+    return [t for t in _TOKEN_SPLIT.split(text) if t and not _DIGITS_ONLY.fullmatch(t)]
+
+
+def client_lookups(word, sl="ko", tl="en"):
+    """
+    Return the lookups the players may issue when a subtitle word is hovered.
+    
+    Args:
+        word: word as stored in precompute_subtitles output
+        sl: source language
+        tl: target language
+    
+    Returns:
+        list: parameter dicts, one per HOVER_CLIENTS form of the word
+    """
+    lookups = []
+    for client in HOVER_CLIENTS:
+        if client["tokenize"]:
+            # subtitle-buffer.js prewarmDictionary skips single characters
+            forms = [t for t in tokenize(word) if len(t) >= 2]
+        else:
+            forms = [word] if word.strip() else []
+        for form in forms:
+            lookups.append(dict(client["extra"], form=form, sl=sl, tl=tl))
+    return lookups
+
+
+def fetch_upstream(upstream_url, params, timeout=UPSTREAM_TIMEOUT):
+    """
+    Fetch one lookup from the upstream dictionary endpoint.
+    
+    Raises:
+        UpstreamError: on HTTP, network or JSON errors
+    """
+    url = f"{upstream_url}?{urllib.parse.urlencode(params)}"
+    request = urllib.request.Request(url, headers={
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        raise UpstreamError(f"Upstream lookup failed for {dict(params)}: {e}") from e
+
+
+class DictionaryProxy:
+    """
+    Cached, coalescing front end for dictionary lookups.
+    
+    Concurrent lookups for the same key share one in-flight Future, so at
+    most one upstream request per key is outstanding at any time.
+    """
+
+    def __init__(self, cache, upstream_url=DEFAULT_UPSTREAM, workers=PREWARM_WORKERS):
+        self.cache = cache
+        self.upstream_url = upstream_url
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.jobs = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "upstream": 0, "errors": 0}
+
+    def lookup(self, params):
+        """
+        Look up one word, from cache if possible.
+        
+        Args:
+            params: dict of query parameters (form, sl, tl, ...)
+        
+        Returns:
+            dict: upstream JSON response
+        
+        Raises:
+            UpstreamError: if the upstream request fails, or a coalesced
+                           lookup times out waiting for it
+        """
+        key_params = canonical_params(params)
+        key = urllib.parse.urlencode(key_params)
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self.lock:
+                self.stats["hits"] += 1
+            return cached
+        
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                future = Future()
+                self.in_flight[key] = future
+                self.stats["misses"] += 1
+                leader = True
+        
+        if not leader:
+            try:
+                return future.result(timeout=FOLLOWER_TIMEOUT)
+            except FutureTimeoutError:
+                raise UpstreamError(f"Timed out waiting for in-flight lookup of {dict(key_params)}")
+        
+        # This caller owns the upstream request; everyone else waits on the Future
+        try:
+            # A previous leader may have filled the cache since our first check
+            value = self.cache.get(key)
+            if value is None:
+                with self.lock:
+                    self.stats["upstream"] += 1
+                value = fetch_upstream(self.upstream_url, key_params)
+                self.cache.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            # Whatever went wrong (IncompleteRead, sqlite3 errors, ...) the
+            # followers must be released with it rather than left waiting
+            with self.lock:
+                self.stats["errors"] += 1
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def prewarm(self, words, sl="ko", tl="en"):
+        """
+        Start a background job that looks up every distinct word.
+        
+        Each word is warmed with every lookup a player may issue for it
+        (see client_lookups).
+        
+        Args:
+            words: iterable of word strings (duplicates are skipped)
+            sl: source language
+            tl: target language
+        
+        Returns:
+            str: job ID for prewarm_status()
+        """
+        lookups = {}
+        for word in words:
+            for params in client_lookups(word, sl, tl):
+                lookups.setdefault(canonical_params(params), params)
+        job_id = uuid.uuid4().hex[:12]
+        job = {"job_id": job_id, "total": len(lookups), "done": 0, "failed": 0,
+               "finished": len(lookups) == 0}
+        self.jobs[job_id] = job
+
+        def warm(params):
+            try:
+                self.lookup(params)
+            except Exception:
+                with self.lock:
+                    job["failed"] += 1
+            with self.lock:
+                job["done"] += 1
+                job["finished"] = job["done"] == job["total"]
+        
+        for params in lookups.values():
+            self.pool.submit(warm, params)
+        return job_id
+
+    def prewarm_precomputed(self, precomputed_data, sl="ko", tl="en"):
+        """
+        Prewarm the vocabulary of one video's precompute_subtitles output.
+        
+        Args:
+            precomputed_data: dict with a words array, or a bare list of word
+                              dicts or strings
+        
+        Returns:
+            str: job ID for prewarm_status()
+        
+        Raises:
+            ValueError: if the data does not have that shape
+        """
+        if isinstance(precomputed_data, dict):
+            words = precomputed_data.get("words", [])
+        else:
+            words = precomputed_data
+        if not isinstance(words, list):
+            raise ValueError("Expected a words array or a list of words")
+        
+        vocabulary = []
+        for w in words:
+            word = w.get("word") if isinstance(w, dict) else w
+            if not isinstance(word, str):
+                raise ValueError(f"Expected a string word, got {w!r}")
+            vocabulary.append(word)
+        return self.prewarm(vocabulary, sl, tl)
+
+    def prewarm_status(self, job_id):
+        """Return a copy of a prewarm job's progress, or None if unknown."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        with self.lock:
+            return dict(job)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        self.cache.close()
+
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end for a DictionaryProxy (set as server.proxy)."""
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        # The player pages fetch this from file:// or another local port
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        proxy = self.server.proxy
+        
+        if url.path == LOOKUP_PATH:
+            params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+            if not params.get("form"):
+                self._send_json(400, {"error": "Missing 'form' parameter"})
+                return
+            try:
+                self._send_json(200, proxy.lookup(params))
+            except UpstreamError as e:
+                self._send_json(502, {"error": str(e)})
+            except Exception as e:
+                self._send_json(500, {"error": f"Lookup failed: {e}"})
+            return
+        
+        if url.path.startswith("/prewarm/"):
+            status = proxy.prewarm_status(url.path[len("/prewarm/"):])
+            if status is None:
+                self._send_json(404, {"error": "Unknown job"})
+            else:
+                self._send_json(200, status)
+            return
+        
+        if url.path == "/stats":
+            self._send_json(200, dict(proxy.stats, cached_entries=len(proxy.cache)))
+            return
+        
+        self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/prewarm":
+            self._send_json(404, {"error": "Not found"})
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            self._send_json(400, {"error": "Invalid JSON body"})
+            return
+        
+        query = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            job_id = self.server.proxy.prewarm_precomputed(
+                data, sl=query.get("sl", "ko"), tl=query.get("tl", "en")
+            )
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(202, self.server.proxy.prewarm_status(job_id))
+
+    def log_message(self, format, *args):
+        # Hover lookups are too frequent to log each one
+        pass
+
+
+def make_server(proxy, host="127.0.0.1", port=8765):
+    """Create (but don't start) an HTTP server bound to a DictionaryProxy."""
+    server = ThreadingHTTPServer((host, port), ProxyRequestHandler)
+    server.proxy = proxy
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Self-check against a local stub upstream
+# ---------------------------------------------------------------------------
+
+class _StubUpstreamHandler(BaseHTTPRequestHandler):
+    """Slow fake dioco endpoint that records the queries it serves."""
+
+    def do_GET(self):
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query, keep_blank_values=True))
+        with self.server.lock:
+            self.server.calls.append(query)
+        time.sleep(self.server.delay)
+        body = json.dumps({"form": query.get("form"), "definitions": ["stub"]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_self_check(concurrency=20):
+    """
+    Exercise coalescing, TTL expiry, LRU eviction and prewarm key matching
+    against a stub upstream, printing one line per check.
+    
+    Returns:
+        bool: True if every check passed
+    """
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), _StubUpstreamHandler)
+    stub.lock = threading.Lock()
+    stub.calls = []
+    stub.delay = 0.2
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    upstream = f"http://127.0.0.1:{stub.server_address[1]}{LOOKUP_PATH}"
+    results = []
+    
+    def check(name, ok, detail):
+        results.append(ok)
+        print(f"[{'PASS' if ok else 'FAIL'}] {name}: {detail}")
+    
+    # Coalescing: N concurrent misses for one word -> one upstream request
+    proxy = DictionaryProxy(DictionaryCache(":memory:"), upstream_url=upstream)
+    barrier = threading.Barrier(concurrency)
+    
+    def hover():
+        barrier.wait()
+        proxy.lookup({"form": "사랑", "sl": "ko", "tl": "en"})
+    
+    threads = [threading.Thread(target=hover) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    check("coalescing", len(stub.calls) == 1,
+          f"{concurrency} concurrent lookups -> {len(stub.calls)} upstream call(s), "
+          f"{proxy.stats['coalesced']} coalesced")
+    proxy.close()
+    
+    # TTL: an expired entry is fetched again
+    stub.delay = 0
+    del stub.calls[:]
+    proxy = DictionaryProxy(DictionaryCache(":memory:", ttl_seconds=0.3), upstream_url=upstream)
+    proxy.lookup({"form": "시간", "sl": "ko", "tl": "en"})
+    proxy.lookup({"form": "시간", "sl": "ko", "tl": "en"})
+    fresh_calls = len(stub.calls)
+    time.sleep(0.5)
+    proxy.lookup({"form": "시간", "sl": "ko", "tl": "en"})
+    check("ttl expiry", fresh_calls == 1 and len(stub.calls) == 2,
+          f"{fresh_calls} call(s) within TTL, {len(stub.calls)} after expiry")
+    proxy.close()
+    
+    # LRU: with room for 3, touching a before adding d evicts b
+    del stub.calls[:]
+    proxy = DictionaryProxy(DictionaryCache(":memory:", max_entries=3), upstream_url=upstream)
+    for form in ("가다", "나다", "다다"):
+        proxy.lookup({"form": form, "sl": "ko", "tl": "en"})
+        time.sleep(0.01)
+    proxy.lookup({"form": "가다", "sl": "ko", "tl": "en"})
+    time.sleep(0.01)
+    proxy.lookup({"form": "라다", "sl": "ko", "tl": "en"})
+    cached = {form for form in ("가다", "나다", "다다", "라다")
+              if proxy.cache.get(urllib.parse.urlencode(
+                  canonical_params({"form": form, "sl": "ko", "tl": "en"}))) is not None}
+    check("lru eviction", cached == {"가다", "다다", "라다"},
+          f"{len(proxy.cache)} entries kept, evicted {sorted({'가다', '나다', '다다', '라다'} - cached)}")
+    proxy.close()
+    
+    # Prewarm: every player's hover lookups are cache hits afterwards, and
+    # upstream saw the same parameters the players send
+    del stub.calls[:]
+    proxy = DictionaryProxy(DictionaryCache(":memory:"), upstream_url=upstream)
+    job_id = proxy.prewarm_precomputed({"words": [{"word": "너를,"}, {"word": "사랑해."}]})
+    while not proxy.prewarm_status(job_id)["finished"]:
+        time.sleep(0.01)
+    before = proxy.stats["upstream"]
+    # index.html / subtitle-dictionary.js
+    proxy.lookup({"form": "너를,", "lemma": "", "sl": "ko", "tl": "en", "pos": "NOUN", "pow": "n"})
+    proxy.lookup({"form": "사랑해.", "lemma": "", "sl": "ko", "tl": "en", "pos": "NOUN", "pow": "n"})
+    # subtitle-buffer.js
+    proxy.lookup({"form": "너를", "sl": "ko", "tl": "en"})
+    proxy.lookup({"form": "사랑해", "sl": "ko", "tl": "en"})
+    check("prewarm hits", proxy.stats["upstream"] == before,
+          f"{proxy.prewarm_status(job_id)['total']} lookups warmed, "
+          f"{proxy.stats['upstream'] - before} upstream call(s) for 4 hovers")
+    hover_query = {"form": "너를,", "lemma": "", "sl": "ko", "tl": "en", "pos": "NOUN", "pow": "n"}
+    check("forwarded params", hover_query in stub.calls and {"form": "너를", "sl": "ko", "tl": "en"} in stub.calls,
+          "upstream received each client's own parameter set")
+    proxy.close()
+    
+    stub.shutdown()
+    stub.server_close()
+    return all(results)
+
+
+def main():
+    """Main function to run the dictionary proxy."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    cache_path = os.path.join(script_dir, "data", "dictionary_cache.sqlite3")
+    
+    args = sys.argv[1:]
+    if "--self-check" in args:
+        sys.exit(0 if run_self_check() else 1)
+    
+    port = 8765
+    upstream = DEFAULT_UPSTREAM
+    prewarm_paths = []
+    
+    i = 0
+    while i < len(args):
+        if args[i] == "--port" and i + 1 < len(args):
+            port = int(args[i + 1])
+        elif args[i] == "--upstream" and i + 1 < len(args):
+            upstream = args[i + 1]
+        elif args[i] == "--prewarm" and i + 1 < len(args):
+            prewarm_paths.append(args[i + 1])
+        else:
+            print(f"Unknown argument: {args[i]}")
+            return
+        i += 2
+    
+    proxy = DictionaryProxy(DictionaryCache(cache_path), upstream_url=upstream)
+    
+    for path in prewarm_paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                job_id = proxy.prewarm_precomputed(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Error: Cannot prewarm from {path}: {e}")
+            continue
+        print(f"Prewarming {proxy.prewarm_status(job_id)['total']} words from {path}")
+    
+    server = make_server(proxy, port=port)
+    print(f"Dictionary proxy on http://127.0.0.1:{port}{LOOKUP_PATH} -> {upstream}")
+    print(f"Cache: {cache_path} ({len(proxy.cache)} entries)")
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        server.server_close()
+        proxy.close()
+
+
+if __name__ == "__main__":
+    main()
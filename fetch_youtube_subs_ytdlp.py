@@ -13,6 +13,8 @@ import subprocess
 import re
 import glob
 
+from timebase import parse_cue_timing
+
 
 # Hardcoded YouTube video ID to fetch subtitles for
 VIDEO_ID = "inNYQUC6dFs"
@@ -116,16 +118,12 @@ def parse_vtt_to_youtube_format(vtt_text):
         
         # Look for timestamp line (contains -->)
         if ' --> ' in line:
-            # Parse VTT timestamp format: HH:MM:SS.mmm --> HH:MM:SS.mmm
-            match = re.match(r'(\d{2}):(\d{2}):(\d{2})\.(\d{3})\s+-->\s+(\d{2}):(\d{2}):(\d{2})\.(\d{3})', line)
+            # Parse VTT timestamp format straight to integer milliseconds:
+            # HH:MM:SS.mmm --> HH:MM:SS.mmm (MM:SS.mmm and ',' also accepted)
+            timing = parse_cue_timing(line)
             
-            if match:
-                # Convert to milliseconds
-                start_h, start_m, start_s, start_ms = int(match.group(1)), int(match.group(2)), int(match.group(3)), int(match.group(4))
-                end_h, end_m, end_s, end_ms = int(match.group(5)), int(match.group(6)), int(match.group(7)), int(match.group(8))
-                
-                start_ms_total = (start_h * 3600 + start_m * 60 + start_s) * 1000 + start_ms
-                end_ms_total = (end_h * 3600 + end_m * 60 + end_s) * 1000 + end_ms
+            if timing:
+                start_ms_total, end_ms_total = timing
                 duration_ms = end_ms_total - start_ms_total
                 
                 # Read subtitle text (next non-empty lines until empty line)
@@ -161,8 +159,8 @@ def parse_vtt_to_youtube_format(vtt_text):
                     
                     if segs:  # Only add event if it has words
                         event = {
-                            "tStartMs": str(int(start_ms_total)),
-                            "dDurationMs": str(int(duration_ms)),
+                            "tStartMs": str(start_ms_total),
+                            "dDurationMs": str(duration_ms),
                             "segs": segs
                         }
                         events.append(event)
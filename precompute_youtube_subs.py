@@ -5,39 +5,148 @@ This script loads the raw YouTube subtitle JSON and extracts individual words
 with their precise timing information. Useful for building word-level search
 and synchronization without runtime API calls.
 
+Pass --html-fragments to also write data/subs_fragments.json: pre-rendered,
+time-chunked subtitle HTML that index.html can insert lazily.
+
 Not for production use.
 """
 
 import os
+import sys
 import json
+import html
+
+from timebase import ms_to_seconds
+
 
+# Characters read from disk per refill when streaming raw subtitles
+STREAM_CHUNK_SIZE = 64 * 1024
 
-def load_raw_subtitles(input_path):
+# Characters that can continue a JSON number
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class Json3EventReader:
     """
-    Load raw YouTube subtitles from JSON file.
-    
-    Args:
-        input_path: path to data/raw_youtube.json
+    Incrementally read the events array of a json3 subtitle file.
     
-    Returns:
-        dict: Parsed JSON data from YouTube API, or None if file doesn't exist
+    Uses json.JSONDecoder.raw_decode over a buffer that is refilled in
+    fixed-size chunks, so only the current event (plus one chunk of text)
+    is held in memory instead of the whole document tree. Other top-level
+    keys (responseContext, etc.) are decoded and discarded. saw_events
+    records whether an 'events' key was found.
     """
-    if not os.path.exists(input_path):
-        print(f"Error: File not found at {input_path}")
-        return None
     
-    try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON in {input_path}")
-        return None
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.saw_events = False
+    
+    def _fill(self):
+        """Append the next chunk to the buffer, dropping consumed text."""
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def _error(self, message):
+        return json.JSONDecodeError(message, self.buf, self.pos)
+    
+    def _peek(self):
+        """Skip whitespace and return the next character ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+    
+    def _expect(self, char):
+        if self._peek() != char:
+            raise self._error(f"Expected '{char}'")
+        self.pos += 1
+    
+    def _decode_value(self):
+        """Decode the next complete JSON value, reading more input as needed."""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            
+            # A number followed only by number characters may be truncated ("2." of "2.5")
+            if not self.eof and not self.buf[end:].strip(_NUMBER_CHARS) and self._fill():
+                continue
+            
+            self.pos = end
+            return value
+    
+    def _iter_array(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        
+        while True:
+            yield self._decode_value()
+            char = self._peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("Expected ',' or ']' in events array")
+    
+    def __iter__(self):
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        
+        while True:
+            key = self._decode_value()
+            self._expect(":")
+            
+            if key == "events":
+                self.saw_events = True
+                yield from self._iter_array()
+            else:
+                self._decode_value()
+            
+            char = self._peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self._error("Expected ',' or '}' in top-level object")
 
 
-def ms_to_seconds(milliseconds):
-    """Convert milliseconds to seconds."""
-    return milliseconds / 1000.0
+def stream_raw_events(input_path, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield subtitle events from a json3 file one at a time.
+    
+    Args:
+        input_path: path to data/raw_youtube.json
+        chunk_size: number of characters read per refill
+    
+    Yields:
+        dict: one event from the 'events' array
+    
+    Raises:
+        json.JSONDecodeError: if the file is not valid json3
+    """
+    with open(input_path, 'r', encoding='utf-8') as f:
+        yield from Json3EventReader(f, chunk_size)
 
 
 def extract_text_from_segments(segs):
@@ -67,7 +176,8 @@ def precompute_subtitles(raw_data):
     Extract word-level timing from raw YouTube subtitle data.
     
     Args:
-        raw_data: dict with 'events' array from YouTube API
+        raw_data: dict with 'events' array from YouTube API, or an iterable
+                  of events (e.g. from stream_raw_events)
     
     Returns:
         dict: Words array with word_id, word, start, end, sentence_id
@@ -76,12 +186,15 @@ def precompute_subtitles(raw_data):
     word_id = 1
     sentence_id = 0
     
-    # Check if events array exists
-    if not raw_data or "events" not in raw_data:
-        print("Warning: No events found in subtitle data")
-        return {"words": words}
-    
-    events = raw_data["events"]
+    if isinstance(raw_data, dict) or raw_data is None:
+        # Check if events array exists
+        if not raw_data or "events" not in raw_data:
+            print("Warning: No events found in subtitle data")
+            return {"words": words}
+        
+        events = raw_data["events"]
+    else:
+        events = raw_data
     
     # Iterate through each subtitle event (sentence)
     for event in events:
@@ -93,12 +206,13 @@ def precompute_subtitles(raw_data):
         if "segs" not in event or not event["segs"]:
             continue
         
-        # Extract timing information
+        # Extract timing information as integer milliseconds
         start_ms = int(event["tStartMs"])
-        duration_ms = int(event["dDurationMs"])
+        end_ms = start_ms + int(event["dDurationMs"])
         
+        # Convert once per event for output; every word shares these values
         start_seconds = ms_to_seconds(start_ms)
-        end_seconds = ms_to_seconds(start_ms + duration_ms)
+        end_seconds = ms_to_seconds(end_ms)
         
         # Extract text from all segments in this event
         text = extract_text_from_segments(event["segs"])
@@ -147,6 +261,115 @@ def save_precomputed_subtitles(data, output_path):
     print(f"Saved precomputed subtitles to {output_path}")
 
 
+def decode_and_escape(text):
+    """
+    Decode HTML entities (e.g., &gt; -> >) and re-escape for safe insertion.
+    
+    Mirrors decodeHTMLEntities in index.html so the browser doesn't have to
+    run it on every word.
+    """
+    return html.escape(html.unescape(text), quote=True)
+
+
+def group_by_sentence(words):
+    """
+    Group words by sentence_id, preserving sentence order.
+    
+    Args:
+        words: list of word entries from precompute_subtitles
+    
+    Returns:
+        list: (sentence_id, words) tuples sorted by sentence_id
+    """
+    grouped = {}
+    for word in words:
+        grouped.setdefault(word["sentence_id"], []).append(word)
+    
+    return sorted(grouped.items())
+
+
+def render_sentence_html(sentence_id, sentence_words):
+    """
+    Render one sentence as the same markup renderSubtitles builds in index.html.
+    
+    Args:
+        sentence_id: ID of the sentence
+        sentence_words: list of word entries belonging to that sentence
+    
+    Returns:
+        str: <div class="subtitle"> fragment with one <span class="word"> per word
+    """
+    spans = []
+    for w in sentence_words:
+        spans.append(
+            f'<span class="word" data-word-id="{w["word_id"]}"'
+            f' data-word="{html.escape(w["word"], quote=True)}"'
+            f' data-start="{w["start"]}" data-end="{w["end"]}"'
+            f' data-sentence-id="{w["sentence_id"]}">'
+            f'{decode_and_escape(w["word"])}</span>'
+        )
+    
+    # Words are separated by a single space, same as the DOM version
+    return f'<div class="subtitle" data-sentence-id="{sentence_id}">{" ".join(spans)}</div>'
+
+
+def build_html_fragments(precomputed_data, chunk_seconds=60):
+    """
+    Pre-render subtitle HTML fragments, chunked by time for lazy insertion.
+    
+    Each sentence is assigned to the chunk containing its first word's start
+    time, so a sentence is never split across chunks.
+    
+    Args:
+        precomputed_data: dict with words array from precompute_subtitles
+        chunk_seconds: length of each time chunk in seconds
+    
+    Returns:
+        dict: chunk_seconds and a chunks array (sorted by chunk_id, one per
+              time window) with chunk_id, start, end, first/last sentence
+              IDs in playback order, word count and html
+    """
+    # Group by time window first, so sentences whose starts are not monotonic
+    # still land in the one chunk covering their window
+    by_chunk = {}
+    for sentence_id, sentence_words in group_by_sentence(precomputed_data.get("words", [])):
+        sentence_start = sentence_words[0]["start"]
+        chunk_id = int(sentence_start // chunk_seconds)
+        by_chunk.setdefault(chunk_id, []).append((sentence_start, sentence_id, sentence_words))
+    
+    chunks = []
+    for chunk_id in sorted(by_chunk):
+        # Sentences inside a chunk are emitted in playback order
+        sentences = sorted(by_chunk[chunk_id], key=lambda s: (s[0], s[1]))
+        chunks.append({
+            "chunk_id": chunk_id,
+            "start": sentences[0][0],
+            "end": max(w["end"] for _, _, words in sentences for w in words),
+            "first_sentence_id": sentences[0][1],
+            "last_sentence_id": sentences[-1][1],
+            "word_count": sum(len(words) for _, _, words in sentences),
+            "html": "".join(render_sentence_html(sid, words) for _, sid, words in sentences)
+        })
+    
+    return {"chunk_seconds": chunk_seconds, "chunks": chunks}
+
+
+def save_html_fragments(fragments, output_path):
+    """
+    Save pre-rendered HTML fragments to JSON file.
+    
+    Args:
+        fragments: dict returned by build_html_fragments
+        output_path: path where to save the JSON file
+    """
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(fragments, f, ensure_ascii=False)
+    
+    print(f"Saved {len(fragments['chunks'])} HTML fragment chunks to {output_path}")
+
+
 def print_summary(precomputed_data):
     """
     Print summary of precomputed subtitles.
@@ -177,21 +400,36 @@ def main():
     script_dir = os.path.dirname(__file__)
     input_path = os.path.join(script_dir, "data", "raw_youtube.json")
     output_path = os.path.join(script_dir, "data", "subs_precomputed.json")
+    fragments_path = os.path.join(script_dir, "data", "subs_fragments.json")
     
     print("Loading raw YouTube subtitles...")
     
-    # Load raw subtitle data
-    raw_data = load_raw_subtitles(input_path)
-    if raw_data is None:
+    if not os.path.exists(input_path):
+        print(f"Error: File not found at {input_path}")
         print("Failed to load raw subtitles. Exiting.")
         return
     
-    # Precompute word-level timing
-    precomputed_data = precompute_subtitles(raw_data)
+    # Precompute word-level timing, streaming events instead of loading the whole file
+    try:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            reader = Json3EventReader(f)
+            precomputed_data = precompute_subtitles(reader)
+    except json.JSONDecodeError:
+        print(f"Error: Invalid JSON in {input_path}")
+        print("Failed to load raw subtitles. Exiting.")
+        return
+    
+    if not reader.saw_events or not precomputed_data["words"]:
+        print("Warning: No events found in subtitle data")
     
     # Save precomputed subtitles
     save_precomputed_subtitles(precomputed_data, output_path)
     
+    # Optionally emit pre-rendered HTML fragments for lazy insertion
+    if "--html-fragments" in sys.argv:
+        fragments = build_html_fragments(precomputed_data)
+        save_html_fragments(fragments, fragments_path)
+    
     # Print summary
     print_summary(precomputed_data)
 
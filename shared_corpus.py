@@ -0,0 +1,722 @@
+"""
+Shared-memory resident corpus for multi-worker subtitle services.
+
+Each worker that json.loads every subs_precomputed.json keeps its own copy
+of the corpus, so memory grows with the number of workers. This module packs
+the precomputed words for a set of videos into one
+multiprocessing.shared_memory block per corpus generation:
+
+- columnar int64 arrays: word_id, start_ms, end_ms, sentence_id, plus a
+  running maximum of end_ms so time lookups stay binary searches even when
+  caption events overlap
+- a UTF-8 string blob with per-word offsets
+- a per-video directory of word and sentence ranges
+- a sentence table sorted by sentence_id within each video (sentence_id,
+  offset and count into a list of word indexes, so a sentence's words need
+  not be contiguous in start-time order)
+
+Any number of worker processes attach read-only and read the columns
+through memoryviews, with zero copies. A small control block holds the
+name of the current generation, so a publisher can swap in a new corpus
+while workers keep running; they pick it up on their next lookup.
+
+Usage:
+    python shared_corpus.py [--replace] [FILES...]   # publish and serve
+    python shared_corpus.py --check                  # memory-vs-workers and hot-swap check
+
+Not for production use.
+"""
+
+import os
+import sys
+import json
+import glob
+import math
+import time
+import struct
+import tempfile
+import multiprocessing
+from array import array
+from bisect import bisect_left, bisect_right
+from multiprocessing import shared_memory, resource_tracker
+
+from build_search_index import load_corpus
+from timebase import ms_to_seconds, seconds_to_ms
+
+
+CORPUS_MAGIC = b"SUBSHM1\0"
+
+# Section name -> array typecode ('q' = int64 column, 'B' = raw bytes)
+SECTIONS = (
+    ("word_id", "q"),
+    ("start_ms", "q"),
+    ("end_ms", "q"),
+    ("end_max_ms", "q"),
+    ("sentence_id", "q"),
+    ("word_offsets", "q"),
+    ("word_blob", "B"),
+    ("video_words", "q"),
+    ("video_sentences", "q"),
+    ("sentence_ids", "q"),
+    ("sentence_first", "q"),
+    ("sentence_count", "q"),
+    ("sentence_words", "q"),
+    ("video_name_offsets", "q"),
+    ("video_name_blob", "B"),
+)
+
+# magic, generation, creator's tracker id, then (offset, length) for every section
+HEADER = struct.Struct("<8sQQ" + "QQ" * len(SECTIONS))
+HEADER_TRACKER_OFFSET = 16
+
+# Control block: sequence counter (odd while writing), generation, creator's
+# tracker id, block name
+CONTROL = struct.Struct("<QQQ128s")
+CONTROL_TRACKER_OFFSET = 16
+
+
+def _tracker_id():
+    """
+    Identify this process's resource tracker, or 0 if it has none.
+    
+    The tracker is reached through a pipe that multiprocessing children
+    inherit, so the pipe's inode is the same in every process sharing it.
+    """
+    fd = getattr(resource_tracker._resource_tracker, "_fd", None)
+    if fd is None:
+        return 0
+    try:
+        return os.fstat(fd).st_ino
+    except OSError:
+        return 0
+
+
+def _attach(name, tracker_offset):
+    """
+    Attach to an existing shared memory block without owning it.
+    
+    Only the creator should unlink a block; a worker whose resource tracker
+    still listed it would have the block unlinked when the worker exits.
+    
+    Args:
+        name: shared memory block name
+        tracker_offset: where the creator stored its _tracker_id() in the block
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    
+    # Python < 3.13 registers every attach. Undo that in worker processes
+    # only: if this process shares the creator's tracker (the creator itself,
+    # or a child it spawned) the registration was a no-op, and unregistering
+    # would drop the creator's own entry.
+    shm = shared_memory.SharedMemory(name=name)
+    creator = struct.unpack_from("<Q", shm.buf, tracker_offset)[0]
+    if creator != _tracker_id():
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _playhead_ms(seconds):
+    """
+    Return the largest integer ms m with m / 1000 <= seconds.
+    
+    Precomputed start/end values are exactly ms / 1000, so start_ms <= m
+    matches start <= t and end_ms > m matches t < end, as compared by
+    find() in index.html. Rounding the playhead to the nearest ms instead
+    would misplace times within half a millisecond of a boundary.
+    """
+    time_ms = math.floor(seconds * 1000)
+    # seconds * 1000 can land a hair either side of an integer
+    if ms_to_seconds(time_ms) > seconds:
+        time_ms -= 1
+    elif ms_to_seconds(time_ms + 1) <= seconds:
+        time_ms += 1
+    return time_ms
+
+
+def _pack_strings(strings):
+    """Encode strings into a UTF-8 blob plus n+1 offsets."""
+    blob = bytearray()
+    offsets = array("q", [0])
+    for text in strings:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def pack_corpus(corpus):
+    """
+    Pack precomputed words into columnar sections.
+    
+    Words of each video are kept in start-time order to allow binary search
+    on start_ms. Sentences are listed separately, sorted by sentence_id, each
+    pointing at its word indexes, so input with out-of-order starts (where a
+    sentence's words end up apart after sorting) is handled too.
+    
+    Args:
+        corpus: iterable of (video_id, words) pairs, words as produced by
+                precompute_subtitles
+    
+    Returns:
+        dict: section name -> array or bytes
+    
+    Raises:
+        ValueError: if two videos share a video_id
+    """
+    columns = {name: array("q") for name in ("word_id", "start_ms", "end_ms", "end_max_ms", "sentence_id",
+                                             "sentence_ids", "sentence_first", "sentence_count",
+                                             "sentence_words")}
+    video_words = array("q", [0])
+    video_sentences = array("q", [0])
+    video_ids = []
+    seen_videos = set()
+    texts = []
+    
+    for video_id, words in corpus:
+        if video_id in seen_videos:
+            raise ValueError(f"Duplicate video id: {video_id}")
+        seen_videos.add(video_id)
+        video_ids.append(video_id)
+        starts = [seconds_to_ms(w["start"]) for w in words]
+        order = range(len(words))
+        if any(a > b for a, b in zip(starts, starts[1:])):
+            order = sorted(order, key=starts.__getitem__)
+        
+        sentences = {}
+        end_max = 0
+        for i in order:
+            word = words[i]
+            index = len(columns["word_id"])
+            columns["word_id"].append(word["word_id"])
+            columns["start_ms"].append(starts[i])
+            columns["end_ms"].append(seconds_to_ms(word["end"]))
+            end_max = max(end_max, columns["end_ms"][-1])
+            columns["end_max_ms"].append(end_max)
+            columns["sentence_id"].append(word["sentence_id"])
+            texts.append(word["word"])
+            sentences.setdefault(word["sentence_id"], []).append(index)
+        
+        for sentence_id in sorted(sentences):
+            members = sentences[sentence_id]
+            columns["sentence_ids"].append(sentence_id)
+            columns["sentence_first"].append(len(columns["sentence_words"]))
+            columns["sentence_count"].append(len(members))
+            columns["sentence_words"].extend(members)
+        
+        video_words.append(len(columns["word_id"]))
+        video_sentences.append(len(columns["sentence_ids"]))
+    
+    sections = dict(columns)
+    sections["word_offsets"], sections["word_blob"] = _pack_strings(texts)
+    sections["video_words"] = video_words
+    sections["video_sentences"] = video_sentences
+    sections["video_name_offsets"], sections["video_name_blob"] = _pack_strings(video_ids)
+    return sections
+
+
+def create_block(name, corpus, generation=0):
+    """
+    Create and fill a shared memory block holding one corpus generation.
+    
+    Args:
+        name: shared memory block name
+        corpus: iterable of (video_id, words) pairs
+        generation: generation number stored in the header
+    
+    Returns:
+        SharedMemory: the new block (caller owns it and must unlink it)
+    """
+    sections = pack_corpus(corpus)
+    
+    layout = []
+    offset = HEADER.size
+    for section, _ in SECTIONS:
+        data = sections[section]
+        length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        offset = (offset + 7) & ~7    # keep int64 columns 8-byte aligned
+        layout.append((offset, length))
+        offset += length
+    
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+    for (section, _), (start, length) in zip(SECTIONS, layout):
+        data = sections[section]
+        shm.buf[start:start + length] = data.tobytes() if isinstance(data, array) else data
+    
+    fields = [value for pair in layout for value in pair]
+    HEADER.pack_into(shm.buf, 0, CORPUS_MAGIC, generation, _tracker_id(), *fields)
+    return shm
+
+
+class SharedCorpus:
+    """
+    Read-only view of one corpus generation in shared memory.
+    
+    All columns are memoryviews over the shared block; nothing is copied
+    except the individual word strings returned by lookups.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.shm = _attach(name, HEADER_TRACKER_OFFSET)
+        buf = self.shm.buf.toreadonly()
+        self._views = [buf]
+        
+        header = HEADER.unpack_from(buf, 0)
+        if header[0] != CORPUS_MAGIC:
+            self.close()
+            raise ValueError(f"Not a shared subtitle corpus: {name}")
+        self.generation = header[1]
+        
+        for i, (section, typecode) in enumerate(SECTIONS):
+            start, length = header[3 + 2 * i], header[4 + 2 * i]
+            view = buf[start:start + length]
+            if typecode != "B":
+                view = view.cast(typecode)
+            self._views.append(view)
+            setattr(self, section, view)
+        
+        self.video_ids = [
+            bytes(self.video_name_blob[self.video_name_offsets[i]:self.video_name_offsets[i + 1]]).decode("utf-8")
+            for i in range(len(self.video_name_offsets) - 1)
+        ]
+        self.video_index = {video_id: i for i, video_id in enumerate(self.video_ids)}
+
+    def close(self):
+        """Release all views and detach from the block."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self.shm.close()
+
+    def __len__(self):
+        return len(self.word_id)
+
+    def word(self, index):
+        """
+        Return one word in precompute_subtitles format.
+        
+        Args:
+            index: global word index
+        """
+        start, end = self.word_offsets[index], self.word_offsets[index + 1]
+        return {
+            "word_id": self.word_id[index],
+            "word": bytes(self.word_blob[start:end]).decode("utf-8"),
+            "start": ms_to_seconds(self.start_ms[index]),
+            "end": ms_to_seconds(self.end_ms[index]),
+            "sentence_id": self.sentence_id[index]
+        }
+
+    def _word_index_at(self, video_id, seconds):
+        video = self.video_index.get(video_id)
+        if video is None:
+            return None
+        lo, hi = self.video_words[video], self.video_words[video + 1]
+        
+        # Words [lo, started) have start <= t. end_max_ms first exceeds t at
+        # the earliest of them that is still playing, same as a linear find()
+        time_ms = _playhead_ms(seconds)
+        started = bisect_right(self.start_ms, time_ms, lo, hi)
+        i = bisect_right(self.end_max_ms, time_ms, lo, started)
+        return i if i < started else None
+
+    def word_at(self, video_id, seconds):
+        """
+        Find the word playing at a time, like updatePlayingWord in index.html.
+        
+        Returns:
+            dict: word entry, or None if nothing is playing
+        """
+        index = self._word_index_at(video_id, seconds)
+        return None if index is None else self.word(index)
+
+    def sentence(self, video_id, sentence_id):
+        """
+        Return a sentence with its words.
+        
+        Returns:
+            dict: sentence_id, start, end and words, or None if not found
+        """
+        video = self.video_index.get(video_id)
+        if video is None:
+            return None
+        lo, hi = self.video_sentences[video], self.video_sentences[video + 1]
+        
+        i = bisect_left(self.sentence_ids, sentence_id, lo, hi)
+        if i == hi or self.sentence_ids[i] != sentence_id:
+            return None
+        
+        first = self.sentence_first[i]
+        words = [self.word(self.sentence_words[j]) for j in range(first, first + self.sentence_count[i])]
+        return {
+            "sentence_id": sentence_id,
+            "start": min(w["start"] for w in words),
+            "end": max(w["end"] for w in words),
+            "words": words
+        }
+
+    def sentence_at(self, video_id, seconds):
+        """Return the sentence containing the word playing at a time, or None."""
+        index = self._word_index_at(video_id, seconds)
+        if index is None:
+            return None
+        return self.sentence(video_id, self.sentence_id[index])
+
+
+class CorpusPublisher:
+    """
+    Owns the control block and publishes corpus generations.
+    
+    Publishing a new generation writes a fresh data block, points the
+    control block at it and unlinks the previous block. Workers already
+    attached to the old block keep a valid mapping until they move on.
+    
+    Args:
+        prefix: name prefix for the control and data blocks
+        replace: take over blocks left behind under this prefix (e.g. by a
+                 crashed publisher) instead of raising FileExistsError
+    """
+
+    def __init__(self, prefix, replace=False):
+        self.prefix = prefix
+        self.generation = 0
+        self.block = None
+        if replace:
+            self._remove_stale()
+        self.control = shared_memory.SharedMemory(name=f"{prefix}_ctl", create=True, size=CONTROL.size)
+        CONTROL.pack_into(self.control.buf, 0, 0, 0, _tracker_id(), b"")
+
+    def _remove_stale(self):
+        """Unlink a leftover control block and its current generation."""
+        try:
+            stale = shared_memory.SharedMemory(name=f"{self.prefix}_ctl")
+        except FileNotFoundError:
+            return
+        _, generation, _, name = CONTROL.unpack_from(stale.buf, 0)
+        stale.close()
+        stale.unlink()
+        
+        # Continue the numbering so new block names cannot collide
+        self.generation = generation
+        name = name.rstrip(b"\0").decode("utf-8")
+        if name:
+            try:
+                block = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                return
+            block.close()
+            block.unlink()
+
+    def publish(self, corpus):
+        """
+        Publish a new corpus generation.
+        
+        Args:
+            corpus: iterable of (video_id, words) pairs
+        
+        Returns:
+            int: the new generation number
+        """
+        generation = self.generation + 1
+        name = f"{self.prefix}_g{generation}"
+        block = create_block(name, corpus, generation)
+        
+        # Seqlock: odd sequence while the name is being rewritten
+        sequence = CONTROL.unpack_from(self.control.buf, 0)[0]
+        struct.pack_into("<Q", self.control.buf, 0, sequence + 1)
+        CONTROL.pack_into(self.control.buf, 0, sequence + 1, generation, _tracker_id(), name.encode("utf-8"))
+        struct.pack_into("<Q", self.control.buf, 0, sequence + 2)
+        
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+        self.block = block
+        self.generation = generation
+        return generation
+
+    def close(self):
+        """Unlink the current generation and the control block."""
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+        self.control.close()
+        self.control.unlink()
+
+
+class CorpusClient:
+    """
+    Worker-side handle that always serves the latest published generation.
+    
+    current() costs one control-block read when nothing has changed, and
+    re-attaches when the publisher has swapped in a new generation.
+    """
+
+    def __init__(self, prefix, retries=50):
+        self.prefix = prefix
+        self.retries = retries
+        self.control = _attach(f"{prefix}_ctl", CONTROL_TRACKER_OFFSET)
+        self.corpus = None
+
+    def _read_control(self):
+        """
+        Read a consistent (generation, name) pair from the control block.
+        
+        Raises:
+            RuntimeError: if the block stays mid-update (e.g. the publisher
+                          died while writing it)
+        """
+        for _ in range(self.retries):
+            sequence, generation, _, name = CONTROL.unpack_from(self.control.buf, 0)
+            if sequence % 2 == 0 and struct.unpack_from("<Q", self.control.buf, 0)[0] == sequence:
+                return generation, name.rstrip(b"\0").decode("utf-8")
+            time.sleep(0.001)
+        
+        raise RuntimeError(f"Control block for {self.prefix} is stuck mid-update")
+
+    def current(self):
+        """
+        Return the SharedCorpus for the latest generation.
+        
+        Raises:
+            RuntimeError: if no generation has been published
+        """
+        for _ in range(self.retries):
+            generation, name = self._read_control()
+            if not name:
+                raise RuntimeError(f"No corpus published under {self.prefix}")
+            if self.corpus is not None and self.corpus.generation == generation:
+                return self.corpus
+            
+            try:
+                corpus = SharedCorpus(name)
+            except FileNotFoundError:
+                # Swapped again between reading the name and attaching
+                time.sleep(0.001)
+                continue
+            
+            if self.corpus is not None:
+                self.corpus.close()
+            self.corpus = corpus
+            return corpus
+        
+        raise RuntimeError(f"Could not attach to a stable generation of {self.prefix}")
+
+    def close(self):
+        if self.corpus is not None:
+            self.corpus.close()
+            self.corpus = None
+        self.control.close()
+
+
+# ---------------------------------------------------------------------------
+# Check: memory as workers are added, and hot-swap without restart
+# ---------------------------------------------------------------------------
+
+# Allowed growth of the added shared-mode Pss from 1 to 4 workers: each
+# worker adds only its own small bookkeeping (video_ids, lookup results)
+MEMORY_GROWTH_FACTOR = 1.25
+MEMORY_GROWTH_SLACK = 2 * 1024 * 1024
+
+
+def _pss_bytes(pid):
+    """Proportional set size of a process: shared pages are split between the processes mapping them."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _synthetic_corpus(num_videos, words_per_video, tag=""):
+    for v in range(num_videos):
+        yield f"video{v}", [
+            {"word_id": i + 1, "word": f"단어{i % 997}{tag}", "start": i * 0.4,
+             "end": i * 0.4 + 0.4, "sentence_id": i // 8}
+            for i in range(words_per_video)
+        ]
+
+
+def _memory_worker(mode, source, started, go, loaded, done):
+    """Wait to be measured, then attach (or json.load) the corpus and touch all of it."""
+    started.set()
+    go.wait()
+    if mode == "shared":
+        client = CorpusClient(source)
+        corpus = client.current()
+        # Read every column so all of the block is resident in this worker
+        for section, _ in SECTIONS:
+            sum(getattr(corpus, section))
+        for video_id in corpus.video_ids:
+            for t in range(0, 4000, 7):
+                corpus.sentence_at(video_id, t * 0.4)
+    else:
+        corpus = [json.load(open(path, encoding="utf-8")) for path in source]
+    
+    # Stay alive until the parent has measured every worker, so they coexist
+    loaded.set()
+    done.wait()
+    if mode == "shared":
+        client.close()
+
+
+def _measure_workers(ctx, mode, source, workers):
+    """
+    Run workers side by side and return the memory they added, in bytes.
+    
+    Pss of this process (which maps the published block) and of every
+    worker is read from /proc/<pid>/smaps_rollup before and after loading,
+    with all workers alive both times. Interpreter pages shared between
+    them cancel out, and a block already resident in the publisher adds
+    nothing however many workers map it, while a private copy adds its
+    full size per worker.
+    """
+    started = [ctx.Event() for _ in range(workers)]
+    loaded = [ctx.Event() for _ in range(workers)]
+    go, done = ctx.Event(), ctx.Event()
+    procs = [ctx.Process(target=_memory_worker, args=(mode, source, s, go, l, done))
+             for s, l in zip(started, loaded)]
+    for p in procs:
+        p.start()
+    try:
+        for event in started:
+            event.wait()
+        pids = [os.getpid()] + [p.pid for p in procs]
+        before = sum(_pss_bytes(pid) for pid in pids)
+        go.set()
+        for event in loaded:
+            event.wait()
+        return sum(_pss_bytes(pid) for pid in pids) - before
+    finally:
+        done.set()
+        for p in procs:
+            p.join()
+
+
+def _swap_worker(prefix, seen):
+    """Poll word_at until a second generation shows up, reporting each change."""
+    client = CorpusClient(prefix)
+    last = None
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        corpus = client.current()
+        word = corpus.word_at("video0", 0.1)["word"]
+        if corpus.generation != last:
+            seen.put((os.getpid(), corpus.generation, word))
+            last = corpus.generation
+            if corpus.generation >= 2:
+                break
+        time.sleep(0.005)
+    client.close()
+
+
+def run_check(num_videos=20, words_per_video=5000):
+    """
+    Check that total memory stays flat as workers are added, then hot-swap.
+    
+    Returns:
+        bool: True if both checks passed
+    """
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("Memory check needs Linux /proc/self/smaps_rollup.")
+        return False
+    
+    ctx = multiprocessing.get_context("spawn")
+    prefix = f"subs{os.getpid()}"
+    publisher = CorpusPublisher(prefix)
+    results = []
+    try:
+        publisher.publish(_synthetic_corpus(num_videos, words_per_video))
+        shared_size = publisher.block.size
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for video_id, words in _synthetic_corpus(num_videos, words_per_video):
+                path = os.path.join(tmp, video_id, "subs_precomputed.json")
+                os.makedirs(os.path.dirname(path))
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump({"words": words}, f, ensure_ascii=False)
+                paths.append(path)
+            
+            print(f"Corpus: {num_videos * words_per_video} words, shared block {shared_size / 1e6:.1f} MB")
+            print(f"{'workers':>7} {'json.load added Pss':>20} {'shared added Pss':>17}")
+            shared_totals = {}
+            for workers in (1, 2, 4):
+                json_total = _measure_workers(ctx, "json", paths, workers)
+                shared_totals[workers] = _measure_workers(ctx, "shared", prefix, workers)
+                print(f"{workers:>7} {json_total / 1e6:>17.1f} MB {shared_totals[workers] / 1e6:>14.1f} MB")
+        
+        bound = shared_totals[1] * MEMORY_GROWTH_FACTOR + MEMORY_GROWTH_SLACK
+        ok = all(total <= bound for total in shared_totals.values())
+        results.append(ok)
+        print(f"[{'PASS' if ok else 'FAIL'}] shared added Pss stays within {bound / 1e6:.1f} MB for 1/2/4 workers")
+        
+        print("\nHot-swap: publishing generation 2 while workers poll...")
+        seen = ctx.Queue()
+        procs = [ctx.Process(target=_swap_worker, args=(prefix, seen)) for _ in range(3)]
+        for p in procs:
+            p.start()
+        time.sleep(2)
+        publisher.publish(_synthetic_corpus(num_videos, words_per_video, tag="-v2"))
+        for p in procs:
+            p.join()
+        
+        final = {}
+        while not seen.empty():
+            pid, generation, word = seen.get()
+            print(f"  worker {pid}: generation {generation}, word_at(video0, 0.1s) = {word}")
+            final[pid] = (generation, word)
+        ok = (len(final) == len(procs)
+              and all(generation == 2 and word.endswith("-v2") for generation, word in final.values()))
+        results.append(ok)
+        print(f"[{'PASS' if ok else 'FAIL'}] every worker moved to generation 2 without restarting")
+    finally:
+        publisher.close()
+    
+    return all(results)
+
+
+def main():
+    """Main function: run the check, or publish a corpus and serve until Ctrl-C."""
+    args = sys.argv[1:]
+    if "--check" in args:
+        sys.exit(0 if run_check() else 1)
+    
+    replace = "--replace" in args
+    args = [arg for arg in args if arg != "--replace"]
+    
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = args or sorted(glob.glob(
+        os.path.join(script_dir, "data", "**", "subs_precomputed*.json"), recursive=True))
+    if not paths:
+        print("Error: No precomputed subtitle files found. Run precompute_youtube_subs.py first.")
+        return
+    
+    try:
+        publisher = CorpusPublisher("subs", replace=replace)
+    except FileExistsError:
+        print("Error: A corpus is already published under 'subs'. If it was left behind by a "
+              "crashed run, start again with --replace.")
+        return
+    
+    try:
+        publisher.publish(load_corpus(paths))
+    except ValueError as e:
+        print(f"Error: {e}")
+        publisher.close()
+        return
+    print(f"Published {len(paths)} file(s) as generation {publisher.generation} "
+          f"({publisher.block.size} bytes). Workers attach with CorpusClient('subs').")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        publisher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,9 @@
 import os
 import json
-import re
 
-
-def time_to_seconds(time_str):
-    """Convert HH:MM:SS.mmm format to seconds."""
-    parts = time_str.strip().split(':')
-    hours = int(parts[0])
-    minutes = int(parts[1])
-    seconds = float(parts[2])
-    return hours * 3600 + minutes * 60 + seconds
+# timebase lives at the repository root: run this as `python -m src.precompute`
+# from there
+from timebase import parse_cue_timing, ms_to_seconds
 
 
 def process_vtt_file(vtt_path):
@@ -31,11 +25,10 @@ def process_vtt_file(vtt_path):
         
         # Look for timestamp line (contains -->)
         if ' --> ' in line:
-            # Parse timestamps using regex
-            match = re.match(r'(\d{2}:\d{2}:\d{2}\.\d{3})\s+-->\s+(\d{2}:\d{2}:\d{2}\.\d{3})', line)
-            if match:
-                start_time = time_to_seconds(match.group(1))
-                end_time = time_to_seconds(match.group(2))
+            # Parse timestamps as integer milliseconds
+            timing = parse_cue_timing(line)
+            if timing:
+                start_ms, end_ms = timing
                 
                 # Read subtitle text (next lines until empty line)
                 text_lines = []
@@ -55,9 +48,10 @@ def process_vtt_file(vtt_path):
                         tokens.append({"id": token_id, "text": word})
                         token_id += 1
                     
+                    # Convert to seconds only for output
                     subtitles.append({
-                        "start": start_time,
-                        "end": end_time,
+                        "start": ms_to_seconds(start_ms),
+                        "end": ms_to_seconds(end_ms),
                         "tokens": tokens
                     })
         
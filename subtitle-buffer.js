@@ -29,6 +29,8 @@ class BufferedSubtitleManager {
     this.driftThreshold = options.driftThreshold || 0.3; // seconds
     this.maxBufferSize = options.maxBufferSize || 100;
     this.dictionaryAPI = options.dictionaryAPI || 'dioco';
+    // Base URL for dioco-style lookups; point at http://127.0.0.1:8765 to use dictionary_proxy.py
+    this.dictionaryEndpoint = options.dictionaryEndpoint || 'https://api-cdn-plus.dioco.io';
     
     // Manual timing mode: capture subtitles without active playback
     this.manualTimingMode = options.manualTimingMode || false;
@@ -362,7 +364,7 @@ class BufferedSubtitleManager {
     });
 
     const response = await fetch(
-      `https://api-cdn-plus.dioco.io/base_dict_getHoverDict_8?${params}`,
+      `${this.dictionaryEndpoint}/base_dict_getHoverDict_8?${params}`,
       { signal: AbortSignal.timeout(2000) } // 2s timeout
     );
 
@@ -22,6 +22,8 @@ class SubtitleDictionary {
       language: options.language || 'ko',
       targetLanguage: options.targetLanguage || 'en',
       dictionaryAPI: options.dictionaryAPI || 'dioco',
+      // Base URL for dioco-style lookups; point at http://127.0.0.1:8765 to use dictionary_proxy.py
+      dictionaryEndpoint: options.dictionaryEndpoint || 'https://api-cdn-plus.dioco.io',
       tooltipDelay: options.tooltipDelay || 300,
       cacheSize: options.cacheSize || 500,
       ...options
@@ -365,7 +367,7 @@ class SubtitleDictionary {
       });
 
       const response = await fetch(
-        `https://api-cdn-plus.dioco.io/base_dict_getHoverDict_8?${params}`
+        `${this.options.dictionaryEndpoint}/base_dict_getHoverDict_8?${params}`
       );
 
       if (!response.ok) throw new Error('API error');
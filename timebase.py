@@ -0,0 +1,204 @@
+"""
+Integer-millisecond timebase shared by the subtitle pipeline.
+
+Subtitle times are kept as integer milliseconds internally and converted to
+seconds only when written out, so adjacent words' end/start values are
+computed from the same integers and compare equal instead of drifting apart
+through float arithmetic.
+
+Timestamps are parsed straight to integers (no float step). The common
+fixed-width shapes (HH:MM:SS.mmm, MM:SS.mmm, with '.' or ',') take a fast
+path: the length and separator positions fix where every field sits, so
+each timestamp is three slices looked up in small precomputed tables, and
+the lookup doubles as validation. Anything else goes through a general
+parser.
+
+Run this file directly for a micro-benchmark against the previous parsers.
+
+Not for production use.
+"""
+
+import re
+import timeit
+
+
+def _parse_timestamp_general(timestamp):
+    """
+    General timestamp parser for shapes the fixed-width path does not cover.
+    
+    Handles 1-digit or 3+ digit hours ("1:02:03.456"), short fractions
+    ("00:01.5"), bare seconds and surrounding whitespace.
+    
+    Raises:
+        ValueError: if the timestamp is malformed
+    """
+    parts = timestamp.strip().replace(',', '.').split(':')
+    if len(parts) > 3:
+        raise ValueError(f"Invalid timestamp: {timestamp!r}")
+    
+    seconds, _, fraction = parts[-1].partition('.')
+    if not seconds.isdigit() or (fraction and not fraction.isdigit()):
+        raise ValueError(f"Invalid timestamp: {timestamp!r}")
+    
+    total = 0
+    for part in parts[:-1]:
+        if not part.isdigit():
+            raise ValueError(f"Invalid timestamp: {timestamp!r}")
+        total = total * 60 + int(part)
+    total = total * 60 + int(seconds)
+    
+    # Pad/truncate the fraction to exactly three digits of milliseconds
+    return total * 1000 + int((fraction + "000")[:3])
+
+
+# Fixed-width field tables. Keys include the separators, so a hit means the
+# field is well formed; a miss (KeyError) drops to the general parser.
+# "HH:MM" -> ms (6000 entries)
+_HOURS_MINUTES = {f"{h:02d}:{m:02d}": (h * 60 + m) * 60000 for h in range(100) for m in range(60)}
+# "MM" -> ms, for MM:SS.mmm
+_MINUTES = {f"{m:02d}": m * 60000 for m in range(60)}
+# ":SS." / ":SS," -> ms
+_SECONDS = {f":{sec:02d}{sep}": sec * 1000 for sec in range(60) for sep in ".,"}
+# "mmm" -> ms
+_MILLIS = {f"{ms:03d}": ms for ms in range(1000)}
+
+
+def parse_timestamp_ms(timestamp):
+    """
+    Parse a subtitle timestamp into integer milliseconds.
+    
+    Args:
+        timestamp: 'HH:MM:SS.mmm' or 'MM:SS.mmm' (',' variants too) take the
+                   fixed-width path; other shapes such as 1-digit hours or
+                   short fractions fall back to a general parser
+    
+    Returns:
+        int: milliseconds
+    
+    Raises:
+        ValueError: if the timestamp is malformed
+    """
+    length = len(timestamp)
+    try:
+        if length == 12:
+            return _HOURS_MINUTES[timestamp[:5]] + _SECONDS[timestamp[5:9]] + _MILLIS[timestamp[9:]]
+        if length == 9:
+            return _MINUTES[timestamp[:2]] + _SECONDS[timestamp[2:6]] + _MILLIS[timestamp[6:]]
+    except KeyError:
+        pass
+    return _parse_timestamp_general(timestamp)
+
+
+def parse_cue_timing(line):
+    """
+    Parse a VTT/SRT cue timing line into integer milliseconds.
+    
+    The usual 'HH:MM:SS.mmm --> HH:MM:SS.mmm' line is read at fixed offsets;
+    other shapes are split on the arrow and parsed field by field. Cue
+    settings after the end time (e.g. "align:start position:0%") are
+    ignored.
+    
+    Args:
+        line: e.g. '00:00:01.000 --> 00:00:03.000 align:start'
+    
+    Returns:
+        tuple: (start_ms, end_ms), or None if the line is not a valid timing line
+    """
+    if line[12:17] == ' --> ' and not line[29:30].strip():
+        try:
+            return (_HOURS_MINUTES[line[:5]] + _SECONDS[line[5:9]] + _MILLIS[line[9:12]],
+                    _HOURS_MINUTES[line[17:22]] + _SECONDS[line[22:26]] + _MILLIS[line[26:29]])
+        except KeyError:
+            pass
+    
+    start, arrow, rest = line.partition('-->')
+    if not arrow:
+        return None
+    
+    end = rest.split(None, 1)[0] if rest.strip() else ""
+    try:
+        return parse_timestamp_ms(start), parse_timestamp_ms(end)
+    except ValueError:
+        return None
+
+
+def ms_to_seconds(milliseconds):
+    """Convert integer milliseconds to seconds (only at output time)."""
+    return milliseconds / 1000.0
+
+
+def seconds_to_ms(seconds):
+    """Convert seconds (e.g. from precomputed output) back to integer milliseconds."""
+    return int(round(seconds * 1000))
+
+
+# ---------------------------------------------------------------------------
+# Benchmark against the previous float/regex parsers
+# ---------------------------------------------------------------------------
+
+def _legacy_time_to_seconds(time_str):
+    # Previous src/precompute.time_to_seconds
+    parts = time_str.strip().split(':')
+    return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
+
+
+_LEGACY_PRECOMPUTE_CUE = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d{3})\s+-->\s+(\d{2}:\d{2}:\d{2}\.\d{3})')
+_LEGACY_YTDLP_CUE = re.compile(r'(\d{2}):(\d{2}):(\d{2})\.(\d{3})\s+-->\s+(\d{2}):(\d{2}):(\d{2})\.(\d{3})')
+
+
+def _legacy_precompute_cue(line):
+    # Previous src/precompute.process_vtt_file timing parse
+    match = _LEGACY_PRECOMPUTE_CUE.match(line)
+    return _legacy_time_to_seconds(match.group(1)), _legacy_time_to_seconds(match.group(2))
+
+
+def _legacy_ytdlp_cue(line):
+    # Previous fetch_youtube_subs_ytdlp.parse_vtt_to_youtube_format timing parse
+    match = _LEGACY_YTDLP_CUE.match(line)
+    start_h, start_m, start_s, start_ms = int(match.group(1)), int(match.group(2)), int(match.group(3)), int(match.group(4))
+    end_h, end_m, end_s, end_ms = int(match.group(5)), int(match.group(6)), int(match.group(7)), int(match.group(8))
+    return ((start_h * 3600 + start_m * 60 + start_s) * 1000 + start_ms,
+            (end_h * 3600 + end_m * 60 + end_s) * 1000 + end_ms)
+
+
+def run_benchmark(number=100000, repeat=9):
+    """Time cue-line and single-timestamp parsing, old vs new, and count float drift."""
+    line = "01:23:45.678 --> 01:23:47.890 align:start position:0%"
+    timestamp = "01:23:45.678"
+    
+    cases = [
+        ("timestamp: time_to_seconds (old)", lambda: _legacy_time_to_seconds(timestamp)),
+        ("timestamp: parse_timestamp_ms", lambda: parse_timestamp_ms(timestamp)),
+        ("cue: src/precompute regex (old)", lambda: _legacy_precompute_cue(line)),
+        ("cue: yt-dlp regex + 8 int() (old)", lambda: _legacy_ytdlp_cue(line)),
+        ("cue: parse_cue_timing", lambda: parse_cue_timing(line)),
+    ]
+    
+    # Interleave the cases and keep the best round of each, so background
+    # load hits old and new parsers alike
+    results = {name: float("inf") for name, _ in cases}
+    for _ in range(repeat):
+        for name, func in cases:
+            seconds = timeit.timeit(func, number=number)
+            results[name] = min(results[name], seconds / number * 1e9)
+    
+    print(f"{'parser':<36} {'ns/call':>10}")
+    for name, _ in cases:
+        print(f"{name:<36} {results[name]:>10.0f}")
+    
+    print()
+    print(f"timestamp speedup: {results[cases[0][0]] / results[cases[1][0]]:.2f}x")
+    print(f"cue speedup vs src/precompute: {results[cases[2][0]] / results[cases[4][0]]:.2f}x")
+    print(f"cue speedup vs yt-dlp parser:  {results[cases[3][0]] / results[cases[4][0]]:.2f}x")
+    
+    # Float drift the integer timebase avoids
+    drift = sum(
+        1 for ms in range(0, 3600 * 1000, 7)
+        if _legacy_time_to_seconds(f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}.{ms % 1000:03d}")
+        != ms_to_seconds(ms)
+    )
+    print(f"timestamps in the first hour (step 7ms) where old float != ms/1000: {drift}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
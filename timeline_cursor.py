@@ -0,0 +1,302 @@
+"""
+Playhead-aware cursor over precomputed subtitle words.
+
+updatePlayingWord in index.html (state.words.find), SubtitleDictionary
+.updateSubtitles (this.subtitles.filter) and our Python tooling all find the
+current word by scanning from the start on every timeupdate. Playback mostly
+moves forward in small steps, so TimelineCursor keeps its position between
+calls instead:
+
+- every start/end time splits the timeline into segments during which the
+  active word does not change; the active word for each segment is worked
+  out once up front
+- a query inside the current segment is O(1), moving forward a few segments
+  steps linearly, and anything else (seeks, rewinds) is a binary search
+- one call returns the active word, its sentence and the next boundary
+  time (when the answer can next change)
+
+The active word matches the linear find(): the earliest word in order with
+start <= t < end.
+
+Run this file directly for a replay benchmark against the linear strategy.
+
+Not for production use.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+from bisect import bisect_right
+
+from timebase import ms_to_seconds, seconds_to_ms
+
+
+# How many segments to step forward before falling back to binary search
+MAX_FORWARD_STEPS = 8
+
+
+def active_words(starts, ends, boundaries):
+    """
+    Sweep the timeline once and find the active word at each boundary.
+    
+    Args:
+        starts: word start times in ms, in word order
+        ends: word end times in ms, in word order
+        boundaries: sorted distinct start/end times in ms
+    
+    Returns:
+        list: for each boundary, the lowest index of a word with
+              start <= t < end, or None
+    """
+    order = sorted(range(len(starts)), key=lambda i: (starts[i], i))
+    result = []
+    active = []
+    position = 0
+    
+    for time_ms in boundaries:
+        while position < len(order) and starts[order[position]] <= time_ms:
+            active.append(order[position])
+            position += 1
+        active = [i for i in active if ends[i] > time_ms]
+        result.append(min(active) if active else None)
+    
+    return result
+
+
+class TimelineCursor:
+    """
+    Cursor over precompute_subtitles output answering "what is playing at t".
+    
+    Args:
+        precomputed_data: dict with a words array (or a bare list of words),
+                          in the order precompute_subtitles emits them
+    """
+
+    def __init__(self, precomputed_data):
+        words = precomputed_data if isinstance(precomputed_data, list) else precomputed_data.get("words", [])
+        self.words = words
+        
+        starts = [seconds_to_ms(w["start"]) for w in words]
+        ends = [seconds_to_ms(w["end"]) for w in words]
+        
+        # Sentences in first-appearance order, each with its words
+        self.sentences = {}
+        for word in words:
+            sentence = self.sentences.get(word["sentence_id"])
+            if sentence is None:
+                sentence = {"sentence_id": word["sentence_id"], "start": word["start"],
+                            "end": word["end"], "words": []}
+                self.sentences[word["sentence_id"]] = sentence
+            sentence["start"] = min(sentence["start"], word["start"])
+            sentence["end"] = max(sentence["end"], word["end"])
+            sentence["words"].append(word)
+        
+        # Segment k covers [boundaries[k], boundaries[k + 1]); the active
+        # word cannot change inside a segment. Queries compare in seconds:
+        # ms / 1000 gives back the exact floats in the precomputed output,
+        # while rounding the playhead to ms would misplace times within
+        # half a millisecond of a boundary
+        boundaries_ms = sorted(set(starts) | set(ends))
+        self.segment_word = active_words(starts, ends, boundaries_ms)
+        self.boundaries = [ms_to_seconds(b) for b in boundaries_ms]
+        
+        self.segment = -1
+        self.state = None
+        self.stats = {"hits": 0, "steps": 0, "seeks": 0}
+
+    def _state_for(self, segment):
+        """Build the (word, sentence, next_boundary) answer for a segment."""
+        if segment < 0:
+            word = None
+        else:
+            index = self.segment_word[segment]
+            word = None if index is None else self.words[index]
+        
+        next_index = segment + 1
+        return {
+            "word": word,
+            "sentence": None if word is None else self.sentences[word["sentence_id"]],
+            "next_boundary": (self.boundaries[next_index]
+                              if next_index < len(self.boundaries) else None)
+        }
+
+    def at(self, seconds):
+        """
+        Return what is playing at a time.
+        
+        Args:
+            seconds: playhead position (e.g. video.currentTime)
+        
+        Returns:
+            dict: word (or None), sentence (or None) and next_boundary, the
+                  next time in seconds at which the answer can change (None
+                  after the last word)
+        """
+        boundaries = self.boundaries
+        segment = self.segment
+        
+        lower = boundaries[segment] if segment >= 0 else None
+        upper = boundaries[segment + 1] if segment + 1 < len(boundaries) else None
+        
+        if (lower is None or seconds >= lower) and (upper is None or seconds < upper):
+            self.stats["hits"] += 1
+            if self.state is None:
+                self.state = self._state_for(segment)
+            return self.state
+        
+        if lower is not None and seconds >= lower:
+            # Forward: step a few segments before giving up and searching
+            steps = 0
+            while (segment + 1 < len(boundaries) and seconds >= boundaries[segment + 1]
+                   and steps < MAX_FORWARD_STEPS):
+                segment += 1
+                steps += 1
+            if segment + 1 < len(boundaries) and seconds >= boundaries[segment + 1]:
+                segment = bisect_right(boundaries, seconds) - 1
+                self.stats["seeks"] += 1
+            else:
+                self.stats["steps"] += 1
+        else:
+            segment = bisect_right(boundaries, seconds) - 1
+            self.stats["seeks"] += 1
+        
+        self.segment = segment
+        self.state = self._state_for(segment)
+        return self.state
+
+    def seek(self, seconds):
+        """Jump to a time with a binary search, regardless of the current position."""
+        self.segment = bisect_right(self.boundaries, seconds) - 1
+        self.state = None
+        self.stats["seeks"] += 1
+        return self.at(seconds)
+
+
+# ---------------------------------------------------------------------------
+# Replay benchmark against the linear strategy
+# ---------------------------------------------------------------------------
+
+def linear_lookup(words, sentences, seconds):
+    """The current strategy: find() for the word, find()+some() for the sentence."""
+    word = next((w for w in words if seconds >= w["start"] and seconds < w["end"]), None)
+    sentence = next((s for s in sentences
+                     if any(w["start"] <= seconds < w["end"] for w in s["words"])), None)
+    return word, sentence
+
+
+def timeupdate_streams(duration, rng):
+    """
+    Simulated playhead streams.
+    
+    Returns:
+        dict: stream name -> list of times in seconds
+    """
+    def steady(step):
+        return [i * step for i in range(int(duration / step))]
+    
+    scrub = []
+    t = 0.0
+    while len(scrub) < 2000:
+        # Drag the scrubber: a run of jumps in one direction, then play a bit
+        direction = rng.choice((-1, 1))
+        for _ in range(rng.randint(5, 20)):
+            t = min(max(t + direction * rng.uniform(1, 15), 0), duration)
+            scrub.append(t)
+        for _ in range(rng.randint(4, 12)):
+            t = min(t + 0.25, duration)
+            scrub.append(t)
+    
+    rewinds = []
+    t = 0.0
+    while t < duration and len(rewinds) < 6000:
+        rewinds.append(t)
+        t += 0.25
+        # Every ~20s of play, jump back 5-10s to re-listen
+        if rng.random() < 0.0125:
+            t = max(t - rng.uniform(5, 10), 0)
+    
+    return {
+        "steady 250ms (timeupdate)": steady(0.25),
+        "steady 16ms (rAF)": steady(0.016)[:20000],
+        "scrubbing": scrub,
+        "rewinds": rewinds,
+    }
+
+
+def synthetic_words(duration, rng):
+    """Words with realistic pacing and some overlapping caption events."""
+    words = []
+    t = 1.0
+    sentence_id = 0
+    while t < duration:
+        count = rng.randint(3, 10)
+        length = count * rng.uniform(0.25, 0.45)
+        for _ in range(count):
+            words.append({"word_id": len(words) + 1, "word": f"w{len(words)}",
+                          "start": round(t, 3), "end": round(t + length, 3),
+                          "sentence_id": sentence_id})
+        sentence_id += 1
+        t += length + rng.choice((0.0, 0.0, 0.3, -0.2))
+    return words
+
+
+def run_benchmark(path=None, seed=0):
+    """Replay timeupdate streams through the linear strategy and the cursor."""
+    rng = random.Random(seed)
+    
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        words = data if isinstance(data, list) else data["words"]
+        source = path
+    else:
+        words = synthetic_words(2 * 3600, rng)
+        source = "synthetic 2h video"
+    
+    duration = max(w["end"] for w in words) + 1
+    cursor = TimelineCursor(words)
+    sentences = list(cursor.sentences.values())
+    
+    print(f"{source}: {len(words)} words, {len(sentences)} sentences, "
+          f"{len(cursor.boundaries)} boundaries")
+    print(f"{'stream':<28} {'queries':>8} {'linear us':>10} {'cursor us':>10} {'speedup':>8}")
+    
+    for name, times in timeupdate_streams(duration, rng).items():
+        # The linear scan is slow late in long videos; sample it
+        sample = times[::max(1, len(times) // 1500)]
+        
+        started = time.perf_counter()
+        expected = [linear_lookup(words, sentences, t)[0] for t in sample]
+        linear_us = (time.perf_counter() - started) / len(sample) * 1e6
+        
+        cursor = TimelineCursor(words)
+        started = time.perf_counter()
+        for t in times:
+            cursor.at(t)
+        cursor_us = (time.perf_counter() - started) / len(times) * 1e6
+        
+        # Replay the sample through a fresh cursor and check it agrees
+        check = TimelineCursor(words)
+        mismatches = sum(1 for t, w in zip(sample, expected) if check.at(t)["word"] is not w)
+        
+        print(f"{name:<28} {len(times):>8} {linear_us:>10.1f} {cursor_us:>10.2f} "
+              f"{linear_us / cursor_us:>7.0f}x"
+              + (f"  ({mismatches} mismatches)" if mismatches else ""))
+        print(f"{'':<28} hits {cursor.stats['hits']}, steps {cursor.stats['steps']}, "
+              f"seeks {cursor.stats['seeks']}")
+
+
+def main():
+    """Main function to run the replay benchmark."""
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    if path and not os.path.exists(path):
+        print(f"Error: File not found at {path}")
+        return
+    
+    run_benchmark(path)
+
+
+if __name__ == "__main__":
+    main()